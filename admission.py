@@ -0,0 +1,198 @@
+"""
+Admission Control
+
+- Caps how many agent streams run at once (global concurrency cap)
+- Requests over the cap wait in per-tenant queues, served weighted round-robin so one busy tenant can't starve others
+- Queue depth limits reject early instead of letting latency grow with the backlog:
+    - tenant queue full -> 429 (that tenant is sending too much)
+    - global queue full / queue wait timed out -> 503 (the server is saturated)
+- Queue wait time is tracked and reported by stats()
+
+Usage:
+    admission = AdmissionController(max_concurrent=8, max_queue_depth=64, tenant_weights={"premium": 3})
+
+    permit = await admission.acquire(tenant="acme")  # raises AdmissionRejected
+    permit = await admission.acquire(tenant="acme", max_wait=scope.remaining())  # wait no longer than the deadline
+    try:
+        ...
+    finally:
+        permit.release()
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Optional
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; carries the HTTP status to return."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class Permit:
+    """A granted concurrency slot. release() is idempotent."""
+
+    def __init__(self, controller: "AdmissionController", tenant: str, queue_wait: float):
+        self._controller = controller
+        self.tenant = tenant
+        self.queue_wait = queue_wait
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+
+class AdmissionController:
+    """Global concurrency cap with weighted round-robin queuing per tenant."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queue_depth: int = 64,
+        max_tenant_queue_depth: int = 16,
+        tenant_weights: Optional[dict[str, int]] = None,
+        default_weight: int = 1,
+        max_queue_wait: Optional[float] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self.max_tenant_queue_depth = max_tenant_queue_depth
+        self.tenant_weights = tenant_weights or {}
+        self.default_weight = default_weight
+        self.max_queue_wait = max_queue_wait
+
+        self._active = 0
+        self._queued = 0
+        self._queues: dict[str, deque[asyncio.Future]] = {}
+        self._ring: deque[str] = deque()  # tenants with waiters, in service order
+        self._credits: dict[str, int] = {}  # grants left in the current turn of the ring head
+
+        self._admitted = 0
+        self._rejected = {429: 0, 503: 0}
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_waits: deque[float] = deque(maxlen=1024)
+
+    async def acquire(self, tenant: str = "default", max_wait: Optional[float] = None) -> Permit:
+        """Wait for a concurrency slot, or raise AdmissionRejected.
+
+        max_wait bounds this call's queue wait below max_queue_wait (e.g. by the time left before a request deadline).
+        """
+        start = time.perf_counter()
+
+        if self._active < self.max_concurrent and not self._queued:
+            self._active += 1
+            return self._admit(tenant, start)
+
+        if self._queued >= self.max_queue_depth:
+            self._rejected[503] += 1
+            raise AdmissionRejected(503, "Server is at capacity, try again later")
+
+        queue = self._queues.setdefault(tenant, deque())
+        if len(queue) >= self.max_tenant_queue_depth:
+            self._rejected[429] += 1
+            raise AdmissionRejected(429, f"Too many queued requests for tenant '{tenant}'")
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self._queued += 1
+        if tenant not in self._credits:
+            self._credits[tenant] = self._weight(tenant)
+            self._ring.append(tenant)
+
+        timeout = self.max_queue_wait
+        if max_wait is not None:
+            timeout = max(0.0, max_wait if timeout is None else min(timeout, max_wait))
+
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we gave up - hand it on
+                self._release()
+            else:
+                self._remove_waiter(tenant, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._rejected[503] += 1
+                raise AdmissionRejected(503, "Timed out waiting for capacity") from None
+            raise
+
+        return self._admit(tenant, start)
+
+    def _admit(self, tenant: str, start: float) -> Permit:
+        waited = time.perf_counter() - start
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        self._recent_waits.append(waited)
+        return Permit(self, tenant, waited)
+
+    def _weight(self, tenant: str) -> int:
+        return max(1, self.tenant_weights.get(tenant, self.default_weight))
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, taking up to `weight` from each tenant per turn."""
+        while self._active < self.max_concurrent and self._ring:
+            tenant = self._ring[0]
+            queue = self._queues[tenant]
+
+            waiter = queue.popleft()
+            self._queued -= 1
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+                self._credits[tenant] -= 1
+
+            if not queue:
+                self._drop_tenant(tenant)
+            elif self._credits[tenant] <= 0:
+                self._credits[tenant] = self._weight(tenant)
+                self._ring.rotate(-1)
+
+    def _remove_waiter(self, tenant: str, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(tenant)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self._queued -= 1
+        if not queue:
+            self._drop_tenant(tenant)
+
+    def _drop_tenant(self, tenant: str) -> None:
+        self._ring.remove(tenant)
+        del self._credits[tenant]
+        del self._queues[tenant]
+
+    def stats(self) -> dict[str, Any]:
+        """Concurrency, queue depth and queue-wait metrics."""
+        waits = sorted(self._recent_waits)
+
+        def percentile(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queued": self._queued,
+            "queued_by_tenant": {tenant: len(queue) for tenant, queue in self._queues.items()},
+            "admitted": self._admitted,
+            "rejected_429": self._rejected[429],
+            "rejected_503": self._rejected[503],
+            "queue_wait_seconds": {
+                "average": self._total_wait / self._admitted if self._admitted else 0.0,
+                "max": self._max_wait,
+                "p50": percentile(0.50),
+                "p99": percentile(0.99),
+            },
+        }
@@ -1,6 +1,9 @@
 from strands import Agent, tool
 from strands_tools import calculator, current_time
 
+from parallel_tools import ParallelToolExecutor
+from tool_memo import ToolMemoHook, shared_tool_cache
+
 # Define a custom tool as a Python function using the @tool decorator
 @tool
 def letter_counter(word: str, letter: str) -> int:
@@ -25,10 +28,21 @@ def letter_counter(word: str, letter: str) -> int:
 
 #### Agent Loop implementation
 
+# For offline / CI runs, record the Bedrock responses once and replay them afterwards (see replay_model.py)
+# from strands.models import BedrockModel
+# from replay_model import RecordingModel, ReplayModel
+# model = RecordingModel(BedrockModel(), "fixtures/agent.json")  # record
+# model = ReplayModel("fixtures/agent.json", time_scale=0)        # replay without delays
+
 # Create an agent with tools from the community-driven strands-tools package
 # as well as our custom letter_counter tool
 agent = Agent(
     tools=[calculator, current_time, letter_counter],
+    # model=model, #Enable to record or replay model responses
+    # Tools requested in the same turn run in parallel, results kept in request order
+    tool_executor=ParallelToolExecutor(max_concurrency=4),
+    # Deterministic tools answer repeated calls from a process-wide cache (tools using the agent are never cached)
+    hooks=[ToolMemoHook(pure_tools=[calculator, letter_counter], cache=shared_tool_cache)],
     # callback_handler=None, #Enable if you don't want reasoning and responses in real-time to the console by default
 )
 
@@ -1,13 +1,18 @@
 import logging
 from strands import Agent
 
+from log_pipeline import configure_logging
+
 # Enables Strands debug log level
 logging.getLogger("strands").setLevel(logging.DEBUG)
 
-# Sets the logging format and streams logs to stderr
-logging.basicConfig(
-    format="%(levelname)s | %(name)s | %(message)s",
-    handlers=[logging.StreamHandler()]
+# Streams logs to stderr without blocking: records are queued and formatted/written by a background thread
+# (see log_pipeline.py)
+log_pipeline = configure_logging(
+    level=logging.DEBUG,
+    loggers=["strands"],
+    json_output=True,                       # one JSON object per line
+    rate_limits={"strands": 200},           # at most 200 debug/info records per second
 )
 
 agent = Agent()
@@ -1,18 +1,26 @@
 import botocore
 from strands import Agent
-from strands.models import BedrockModel
 from botocore.config import Config as BotocoreConfig
 
+from bedrock_clients import SharedBedrockModel, bedrock_clients
+from rate_limiter import AdaptiveRateLimiter, RateLimitedModel
+
 # Create a boto client config with custom settings
 boto_config = BotocoreConfig(
-    retries={"max_attempts": 3, "mode": "standard"},
+    # One HTTP attempt per call: the rate limiter below retries throttled calls at its own pace, boto retrying them
+    # as well would multiply the calls (see rate_limiter.py)
+    retries={"total_max_attempts": 1},
     connect_timeout=5,
-    read_timeout=60
+    read_timeout=60,
+    max_pool_connections=50,  # connections kept open per client, shared by every model using it
+    tcp_keepalive=True
 )
 
 
 # Create a configured Bedrock model
-bedrock_model = BedrockModel(
+# SharedBedrockModel takes the same arguments, but reuses one boto client (and its connection pool) per
+# region / credentials / client config across the whole process instead of building a new one (see bedrock_clients.py)
+bedrock_model = SharedBedrockModel(
     # model_id="anthropic.claude-sonnet-4-20250514-v1:0",
     region_name="us-east-1",  # Specify a different region than the default
     temperature=0.3,
@@ -22,8 +30,46 @@ bedrock_model = BedrockModel(
     max_tokens=200
 )
 
+# To spread requests over several regions instead, route to the fastest healthy one and hedge slow requests
+# (see region_router.py)
+# from region_router import RegionRouter
+# bedrock_model = RegionRouter(
+#     [
+#         SharedBedrockModel(region_name=region, boto_client_config=boto_config, temperature=0.3, max_tokens=200)
+#         for region in ["us-east-1", "us-west-2"]
+#     ],
+#     hedge_after=2.0,  # seconds without a first token before a second region is tried
+# )
+
+# Pace calls client-side: requests/tokens per minute shared by every agent using this limiter, halved on throttling
+# and slowly raised again; throttled calls are queued again instead of failing (see rate_limiter.py)
+rate_limiter = AdaptiveRateLimiter(requests_per_minute=100, tokens_per_minute=200_000)
+
+# To answer simple requests with a cheaper model, try Haiku first and only escalate to bedrock_model on a hedging,
+# empty or truncated answer, an invalid tool call, or a long tool loop (see cascade_model.py)
+# from cascade_model import CascadeModel, Tier, invalid_tool_use, low_confidence, tool_complexity
+# bedrock_model = CascadeModel(
+#     [
+#         Tier(
+#             "haiku",
+#             SharedBedrockModel(
+#                 model_id="anthropic.claude-3-5-haiku-20241022-v1:0", boto_client_config=boto_config, max_tokens=200
+#             ),
+#             0.8,
+#             4.0,
+#         ),
+#         Tier("sonnet", bedrock_model, 3.0, 15.0),  # prices per million input / output tokens
+#     ],
+#     pre_checks=[tool_complexity(max_tool_rounds=2)],
+#     post_checks=[low_confidence(), invalid_tool_use()],
+# )
+
 # Create an agent with the configured model
-agent = Agent(model=bedrock_model)
+agent = Agent(model=RateLimitedModel(bedrock_model, rate_limiter))
 
 # Use the agent
-response = agent("Write a short story about an AI assistant.")
\ No newline at end of file
+response = agent("Write a short story about an AI assistant.")
+
+# Connection pool utilization of the shared clients, current rate and queue depth of the limiter
+print(bedrock_clients.stats())
+print(rate_limiter.stats())
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+Agent Metrics for Prometheus
+
+- Aggregates the per-request agent metrics (the EventLoopMetrics behind result.metrics.get_summary()) across all
+  requests, instead of printing them one call at a time
+- Recorded per request:
+    - agent cycles per request
+    - model latency per cycle (the "stream_messages" trace of each cycle)
+    - tool duration per call, by tool (the "Tool: ..." traces)
+    - tool calls by tool and outcome
+    - input / output / cache read / cache write tokens
+    - time to first token and total request duration, by outcome
+- Exposed in the Prometheus text format (render()), e.g. on a /metrics endpoint; an OpenTelemetry collector can
+  scrape it with its Prometheus receiver
+- Recording is lock-free: every thread writes to its own shard, shards are only summed when scraped
+- Other components publish their stats() with add_collector(): numbers become gauges, or counters (with a _total
+  suffix) for the keys listed as counters; a nested dict becomes one series per entry, labelled by its key (the label
+  is named after "_by_<label>" in the key, e.g. queued_by_tenant{tenant="..."}, otherwise "stat", e.g.
+  queue_wait_seconds{stat="p99"})
+
+Usage:
+    agent_metrics = AgentMetrics()
+    agent_metrics.observe(agent.event_loop_metrics, duration=1.2, status="ok")
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(agent_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterable
+
+from strands.telemetry.metrics import EventLoopMetrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+CYCLE_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class _Metric:
+    """A metric whose values live in per-thread shards, so recording never takes a lock."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._local = threading.local()
+        # Appending is atomic; shards are only read while scraping
+        self._shards: list[dict[Labels, Any]] = []
+
+    def _shard(self) -> dict[Labels, Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            self._shards.append(shard)
+        return shard
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        shard = self._shard()
+        key = tuple(sorted(labels.items()))
+        shard[key] = shard.get(key, 0) + amount
+
+    def values(self) -> dict[Labels, float]:
+        totals: dict[Labels, float] = {}
+        for shard in list(self._shards):
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = tuple(sorted(labels.items()))
+        series = shard.get(key)
+        if series is None:
+            # bucket counts (+Inf last), sum, count
+            series = shard[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def values(self) -> dict[Labels, tuple[list[int], float, int]]:
+        totals: dict[Labels, tuple[list[int], float, int]] = {}
+        for shard in list(self._shards):
+            for key, (counts, total, count) in list(shard.items()):
+                merged_counts, merged_total, merged_count = totals.get(key, ([0] * len(counts), 0.0, 0))
+                totals[key] = (
+                    [a + b for a, b in zip(merged_counts, counts)],
+                    merged_total + total,
+                    merged_count + count,
+                )
+        return totals
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        for key, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if isinstance(bound, str) else _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(key)} {count}"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class AgentMetrics:
+    """Request, model, tool and token metrics aggregated over every agent invocation."""
+
+    def __init__(self, prefix: str = "strands"):
+        self.requests = Counter(f"{prefix}_requests_total", "Agent requests by outcome")
+        self.request_duration = Histogram(f"{prefix}_request_duration_seconds", "Agent request duration by outcome")
+        self.time_to_first_token = Histogram(f"{prefix}_time_to_first_token_seconds", "Time until the first text")
+        self.cycles = Histogram(f"{prefix}_agent_cycles", "Event loop cycles per request", CYCLE_BUCKETS)
+        self.model_latency = Histogram(f"{prefix}_model_latency_seconds", "Model call duration per cycle")
+        self.tool_duration = Histogram(f"{prefix}_tool_duration_seconds", "Tool call duration by tool")
+        self.tool_calls = Counter(f"{prefix}_tool_calls_total", "Tool calls by tool and outcome")
+        self.tokens = Counter(f"{prefix}_tokens_total", "Model tokens by type")
+        self._metrics: list[_Metric] = [
+            self.requests,
+            self.request_duration,
+            self.time_to_first_token,
+            self.cycles,
+            self.model_latency,
+            self.tool_duration,
+            self.tool_calls,
+            self.tokens,
+        ]
+        self._collectors: list[tuple[str, Callable[[], dict[str, Any]], frozenset[str]]] = []
+
+    def add_collector(
+        self, prefix: str, collect: Callable[[], dict[str, Any]], counters: Iterable[str] = ()
+    ) -> None:
+        """Publish the numeric values of collect() (e.g. agent_pool.stats) as prefix_<key>.
+
+        Keys in counters are monotonic counts and are exported as counters, the rest as gauges.
+        """
+        self._collectors.append((prefix, collect, frozenset(counters)))
+
+    def observe(self, metrics: EventLoopMetrics, duration: float, status: str = "ok") -> None:
+        """Record one finished request from its agent's event loop metrics."""
+        self.requests.inc(status=status)
+        self.request_duration.observe(duration, status=status)
+        self.cycles.observe(metrics.cycle_count)
+
+        for cycle in metrics.traces:
+            for child in cycle.children:
+                child_duration = child.duration()
+                if child_duration is None:
+                    continue
+                if child.name == "stream_messages":
+                    self.model_latency.observe(child_duration)
+                elif child.name.startswith("Tool: "):
+                    self.tool_duration.observe(child_duration, tool=child.metadata.get("tool_name", child.name[6:]))
+
+        for tool_name, tool_metrics in metrics.tool_metrics.items():
+            if tool_metrics.success_count:
+                self.tool_calls.inc(tool_metrics.success_count, tool=tool_name, status="success")
+            if tool_metrics.error_count:
+                self.tool_calls.inc(tool_metrics.error_count, tool=tool_name, status="error")
+
+        usage = metrics.accumulated_usage
+        for field, token_type in (
+            ("inputTokens", "input"),
+            ("outputTokens", "output"),
+            ("cacheReadInputTokens", "cache_read"),
+            ("cacheWriteInputTokens", "cache_write"),
+        ):
+            if usage.get(field):
+                self.tokens.inc(usage[field], type=token_type)
+
+    async def time_first_token(
+        self, batches: AsyncIterator[list[dict[str, Any]]], start: float
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Pass stream event batches through, recording when the first text event shows up."""
+        seen = False
+        async for batch in batches:
+            if not seen and any(event["type"] == "text" for event in batch):
+                seen = True
+                self.time_to_first_token.observe(time.monotonic() - start)
+            yield batch
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, collect, counters in self._collectors:
+            for key, value in collect().items():
+                lines.extend(_collected(prefix, key, value, key in counters))
+        return "\n".join(lines) + "\n"
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _collected(prefix: str, key: str, value: Any, counter: bool) -> list[str]:
+    """Exposition lines of one stats() entry: a number, or a dict of numbers as labelled series."""
+    if isinstance(value, dict):
+        label = key.partition("_by_")[2]
+        series = [(((label or "stat", str(k)),), v) for k, v in value.items() if _is_number(v)]
+    elif _is_number(value):
+        series = [((), value)]
+    else:
+        return []
+    if not series:
+        return []
+
+    name = f"{prefix}_{key}"
+    if counter:
+        name = f"{prefix}_{key.removeprefix('total_')}_total"
+    lines = [f"# TYPE {name} {'counter' if counter else 'gauge'}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(v)}" for labels, v in series)
+    return lines
+
@@ -0,0 +1,109 @@
+"""
+Agent Pool
+
+- Pre-builds a fixed number of Agents at startup so request handlers don't pay for Agent construction
+- All pooled agents share one model instance and one ToolRegistry; the default model takes its boto client
+  (and connection pool) from the process-wide registry in bedrock_clients.py
+- Agents are reset (messages, state, metrics) when they are returned, so every checkout starts clean
+- Checkout is bounded - when every agent is busy, callers wait on the pool instead of building a new one
+
+Usage:
+    pool = AgentPool(size=8, tools=[calculator, http_request], callback_handler=None)
+
+    async with pool.checkout() as agent:
+        async for event in agent.stream_async(prompt):
+            ...
+
+    pool.stats()  # size, available, in_use, wait time metrics
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from strands import Agent
+from strands.agent.state import AgentState
+from strands.models import Model
+from strands.telemetry.metrics import EventLoopMetrics
+
+from bedrock_clients import SharedBedrockModel
+
+
+class AgentPool:
+    """Bounded pool of pre-built, reset-between-uses agents."""
+
+    def __init__(
+        self,
+        size: int = 4,
+        model: Optional[Model] = None,
+        tools: Optional[list[Any]] = None,
+        **agent_kwargs: Any,
+    ):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.size = size
+        self.model = model or SharedBedrockModel()
+
+        # Build the first agent normally, then share its tool registry with the rest of the pool
+        first = Agent(model=self.model, tools=tools, **agent_kwargs)
+        self.tool_registry = first.tool_registry
+
+        self._agents: asyncio.Queue[Agent] = asyncio.Queue(maxsize=size)
+        self._agents.put_nowait(first)
+        for _ in range(size - 1):
+            agent = Agent(model=self.model, tools=[], **agent_kwargs)
+            agent.tool_registry = self.tool_registry
+            self._agents.put_nowait(agent)
+
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def tool_names(self) -> list[str]:
+        """Names of the tools every pooled agent has."""
+        return list(self.tool_registry.get_all_tools_config().keys())
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[Agent]:
+        """Borrow an agent for the duration of the block, waiting if the pool is exhausted."""
+        start = time.perf_counter()
+        agent = await self._agents.get()
+        waited = time.perf_counter() - start
+
+        self._checkouts += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        if waited > 0.001:
+            self._waits += 1
+
+        try:
+            yield agent
+        finally:
+            self._reset(agent)
+            self._agents.put_nowait(agent)
+
+    def _reset(self, agent: Agent) -> None:
+        """Clear everything a previous request may have left on the agent."""
+        agent.messages.clear()
+        agent.state = AgentState()
+        agent.event_loop_metrics = EventLoopMetrics()
+        agent.conversation_manager.removed_message_count = 0
+        agent.trace_span = None
+
+    def stats(self) -> dict[str, Any]:
+        """Pool size and checkout wait-time metrics."""
+        available = self._agents.qsize()
+        return {
+            "size": self.size,
+            "available": available,
+            "in_use": self.size - available,
+            "checkouts": self._checkouts,
+            "waited_checkouts": self._waits,
+            "total_wait_seconds": self._total_wait,
+            "average_wait_seconds": self._total_wait / self._checkouts if self._checkouts else 0.0,
+            "max_wait_seconds": self._max_wait,
+        }
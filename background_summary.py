@@ -0,0 +1,202 @@
+"""
+Background Summarization
+
+- SummarizingConversationManager only summarizes when the model reports a context overflow, so the request that
+  hits the limit waits for an extra model call
+- BackgroundSummarizingConversationManager starts summarizing the older messages in a background thread as soon as
+  the conversation crosses soft_threshold of max_tokens (estimated, see token_budget.MessageTokenCounter); it covers
+  at least summary_ratio of the messages, and enough to bring the rest down to half the soft threshold
+- The finished summary is swapped in between turns (at the end of a turn or when the next one starts), in one
+  assignment of agent.messages, so the foreground turn never waits for it
+- The summary is only used if the messages it covers are still at the start of the conversation; if the history was
+  replaced meanwhile (session restore, manual edits) the summary is discarded (or cancelled, if not started yet) and
+  a new one starts on the next turn over the threshold, once the discarded one has finished running
+- Only on an actual context overflow does a turn wait, and then for the summary already in flight (if any) rather
+  than starting another one; without one it falls back to summarizing synchronously
+- The summarization runs on summarization_agent if given, otherwise on a separate agent using the same model, so the
+  foreground agent's messages and system prompt are never touched from the background
+- Each manager runs its summaries on its own background thread, one at a time, and the synchronous fallback waits for
+  a running one: a summarizer Agent is not thread-safe, so summarization_agent must not be shared between managers
+
+Usage:
+    conversation_manager = BackgroundSummarizingConversationManager(max_tokens=100_000, soft_threshold=0.7)
+    agent = Agent(conversation_manager=conversation_manager)
+    print(conversation_manager.stats())
+"""
+
+import logging
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Optional
+
+from strands.agent.conversation_manager import NullConversationManager, SummarizingConversationManager
+from strands.hooks import BeforeInvocationEvent
+from strands.types.content import Message, Messages
+from strands.types.exceptions import ContextWindowOverflowException
+
+from token_budget import MessageTokenCounter
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingSummary:
+    def __init__(self, future: "Future[Message]", prefix: list[Message], replaces_summary: bool):
+        self.future = future
+        # The messages being summarized, as they were at the start of the conversation
+        self.prefix = prefix
+        self.replaces_summary = replaces_summary
+
+    def matches(self, messages: Messages) -> bool:
+        """Whether the summarized messages are still the start of the conversation."""
+        return len(messages) >= len(self.prefix) and all(
+            message is original for message, original in zip(messages, self.prefix)
+        )
+
+
+class BackgroundSummarizingConversationManager(SummarizingConversationManager):
+    """Summarizes older messages in the background before the context fills up."""
+
+    def __init__(
+        self,
+        max_tokens: int = 100_000,
+        soft_threshold: float = 0.7,
+        summary_ratio: float = 0.3,
+        preserve_recent_messages: int = 10,
+        summarization_agent: Optional["Agent"] = None,
+        summarization_system_prompt: Optional[str] = None,
+    ):
+        super().__init__(summary_ratio, preserve_recent_messages, summarization_agent, summarization_system_prompt)
+        self.max_tokens = max_tokens
+        self.soft_threshold = soft_threshold
+        self.counter = MessageTokenCounter()
+        self._pending: Optional[_PendingSummary] = None
+        # The last summary submitted, discarded or not: no other starts before it is done
+        self._running: Optional["Future[Message]"] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        # Held while the summarizer agent is in use, in the background or by the synchronous fallback
+        self._summarizer_lock = threading.Lock()
+        self._background_agent: Optional["Agent"] = None
+        self._hooked_agents: "weakref.WeakSet[Agent]" = weakref.WeakSet()
+
+        self.started = 0
+        self.swapped = 0
+        self.discarded = 0
+        self.failed = 0
+        self.waited = 0
+
+    def apply_management(self, agent: "Agent", **kwargs: Any) -> None:
+        """Swap in a finished summary, then start a new one if the conversation is over the soft threshold."""
+        if agent not in self._hooked_agents:
+            agent.hooks.add_callback(BeforeInvocationEvent, self._before_invocation)
+            self._hooked_agents.add(agent)
+
+        self._swap_if_ready(agent)
+        total = self.counter.sync(agent.messages)
+        if self._pending is None and total >= self.max_tokens * self.soft_threshold:
+            self._start(agent)
+
+    def _before_invocation(self, event: BeforeInvocationEvent) -> None:
+        self._swap_if_ready(event.agent)
+
+    def reduce_context(self, agent: "Agent", e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """On overflow, wait for the summary already in flight; summarize synchronously only without one."""
+        pending = self._pending
+        if pending is not None and pending.matches(agent.messages):
+            self.waited += 1
+            if self._swap_if_ready(agent, wait=True):
+                return
+        # Waits for a discarded summary that is still running on the summarizer
+        with self._summarizer_lock:
+            super().reduce_context(agent, e, **kwargs)
+
+    def _start(self, agent: "Agent") -> None:
+        if self._running is not None and not self._running.done():
+            return
+        messages = agent.messages
+        # At least summary_ratio of the messages, and enough to bring the rest to half the soft threshold
+        count = max(1, int(len(messages) * self.summary_ratio))
+        remaining = self.counter.total - sum(self.counter[i] for i in range(count))
+        while count < len(messages) and remaining > self.max_tokens * self.soft_threshold / 2:
+            remaining -= self.counter[count]
+            count += 1
+        count = min(count, len(messages) - self.preserve_recent_messages)
+        if count <= 0:
+            return
+        try:
+            count = self._adjust_split_point_for_tool_pairs(messages, count)
+        except ContextWindowOverflowException:
+            return
+        if count <= 0 or count >= len(messages):
+            return
+
+        prefix = messages[:count]
+        future = self._executor.submit(self._summarize, list(prefix), self._summarizer(agent))
+        self._pending = _PendingSummary(future, prefix, prefix[0] is self._summary_message)
+        self._running = future
+        self.started += 1
+        logger.debug("messages=<%s> | started background summary", count)
+
+    def _summarize(self, messages: Messages, summarizer: "Agent") -> Message:
+        with self._summarizer_lock:
+            return self._generate_summary(messages, summarizer)
+
+    def _summarizer(self, agent: "Agent") -> "Agent":
+        """The agent summaries run on: never the foreground agent, whose state _generate_summary swaps out."""
+        if self.summarization_agent is not None:
+            return self.summarization_agent
+        if self._background_agent is None or self._background_agent.model is not agent.model:
+            from strands import Agent
+
+            self._background_agent = Agent(
+                model=agent.model, callback_handler=None, conversation_manager=NullConversationManager()
+            )
+        return self._background_agent
+
+    def _swap_if_ready(self, agent: "Agent", wait: bool = False) -> bool:
+        """Swap the finished summary into the conversation. Returns whether it was swapped in."""
+        pending = self._pending
+        if pending is None:
+            return False
+        messages = agent.messages
+        if not pending.matches(messages):
+            # The conversation changed under the summary; if it is already running, _running keeps the next one
+            # from starting until it is done
+            pending.future.cancel()
+            self._pending = None
+            self.discarded += 1
+            logger.debug("discarded background summary, conversation changed")
+            return False
+        if not wait and not pending.future.done():
+            return False
+
+        self._pending = None
+        try:
+            summary = pending.future.result()
+        except Exception as e:
+            self.failed += 1
+            logger.warning("error=<%s> | background summarization failed", e)
+            return False
+
+        count = len(pending.prefix)
+        self.removed_message_count += count - (1 if pending.replaces_summary else 0)
+        self._summary_message = summary
+        messages[:] = [summary, *messages[count:]]
+        self.swapped += 1
+        logger.debug("messages=<%s> | swapped in background summary", count)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "estimated_tokens": self.counter.total,
+            "max_tokens": self.max_tokens,
+            "in_flight": self._running is not None and not self._running.done(),
+            "started": self.started,
+            "swapped": self.swapped,
+            "discarded": self.discarded,
+            "failed": self.failed,
+            "waited_on_overflow": self.waited,
+        }
@@ -0,0 +1,182 @@
+"""
+Batch Runner
+
+- Runs every prompt in a JSONL file through an agent, several at a time (agent.stream_async under a concurrency limit)
+- Input is streamed line by line, so the file can be larger than memory
+- Results are appended to an output JSONL as each prompt finishes (one record per line, flushed immediately)
+- The output file doubles as the checkpoint: re-running with the same output skips ids that already succeeded,
+  so a crashed run resumes where it stopped (failed ids are retried; the last record for an id wins)
+- Reports throughput while running and at the end: prompts/sec, output tokens/sec
+
+Usage:
+    python batch_runner.py requests.jsonl results.jsonl --concurrency 16 --prompt-field body
+
+Input line:  {"request_id": "r-1", "prompt": "..."}
+Output line: {"id": "r-1", "status": "ok", "response": "...", "usage": {...}, "latency_s": 1.2}
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Iterator, Optional, TextIO
+
+from agent_pool import AgentPool
+
+
+def read_prompts(path: str, id_field: str, prompt_field: str) -> Iterator[tuple[str, str]]:
+    """Yield (id, prompt) pairs from a JSONL file, one line at a time."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield str(record.get(id_field, line_number)), record[prompt_field]
+
+
+def completed_ids(output_path: str) -> set[str]:
+    """Ids that already have a successful result in the output file."""
+    done: set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Partially written last line from a crash
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+            elif "id" in record:
+                done.discard(record["id"])
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class BatchStats:
+    """Running totals for throughput reporting."""
+
+    def __init__(self) -> None:
+        self.start = time.monotonic()
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def summary(self) -> dict[str, Any]:
+        elapsed = time.monotonic() - self.start
+        finished = self.succeeded + self.failed
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_s": round(elapsed, 2),
+            "prompts_per_s": round(finished / elapsed, 2) if elapsed else 0.0,
+            "output_tokens_per_s": round(self.output_tokens / elapsed, 1) if elapsed else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+async def run_prompt(agent_pool: AgentPool, prompt_id: str, prompt: str) -> dict[str, Any]:
+    start = time.monotonic()
+    async with agent_pool.checkout() as agent:
+        try:
+            chunks = []
+            result = None
+            async for event in agent.stream_async(prompt):
+                if "data" in event:
+                    chunks.append(event["data"])
+                elif "result" in event:
+                    result = event["result"]
+        except Exception as e:
+            return {"id": prompt_id, "status": "error", "error": str(e), "latency_s": round(time.monotonic() - start, 3)}
+
+    usage = dict(result.metrics.accumulated_usage) if result else {}
+    return {
+        "id": prompt_id,
+        "status": "ok",
+        "response": "".join(chunks),
+        "usage": usage,
+        "latency_s": round(time.monotonic() - start, 3),
+    }
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    agent_pool: AgentPool,
+    id_field: str = "request_id",
+    prompt_field: str = "prompt",
+    report_every: Optional[float] = 10.0,
+) -> dict[str, Any]:
+    """Run all prompts from input_path with at most agent_pool.size in flight, appending results to output_path."""
+    done = completed_ids(output_path)
+    stats = BatchStats()
+    queue: asyncio.Queue[Optional[tuple[str, str]]] = asyncio.Queue(maxsize=agent_pool.size * 2)
+
+    def write(out: TextIO, record: dict[str, Any]) -> None:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    async def worker(out: TextIO) -> None:
+        while (item := await queue.get()) is not None:
+            record = await run_prompt(agent_pool, *item)
+            write(out, record)
+            if record["status"] == "ok":
+                stats.succeeded += 1
+                stats.input_tokens += record["usage"].get("inputTokens", 0)
+                stats.output_tokens += record["usage"].get("outputTokens", 0)
+            else:
+                stats.failed += 1
+
+    async def reporter() -> None:
+        while True:
+            await asyncio.sleep(report_every)
+            print(json.dumps(stats.summary()), flush=True)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        if out.tell() and not _ends_with_newline(output_path):
+            # Terminate a line cut short by a crash so the next record starts clean
+            out.write("\n")
+        workers = [asyncio.create_task(worker(out)) for _ in range(agent_pool.size)]
+        progress = asyncio.create_task(reporter()) if report_every else None
+
+        # Feed the queue as workers drain it, so only a small window of the input is in memory
+        for prompt_id, prompt in read_prompts(input_path, id_field, prompt_field):
+            if prompt_id in done:
+                stats.skipped += 1
+                continue
+            await queue.put((prompt_id, prompt))
+        for _ in workers:
+            await queue.put(None)
+
+        await asyncio.gather(*workers)
+        if progress:
+            progress.cancel()
+
+    return stats.summary()
+
+
+if __name__ == "__main__":
+    from strands_tools import calculator, current_time
+
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through an agent concurrently")
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("output", help="Output JSONL file (appended to; used to resume)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Prompts in flight at once")
+    parser.add_argument("--id-field", default="request_id")
+    parser.add_argument("--prompt-field", default="prompt")
+    args = parser.parse_args()
+
+    pool = AgentPool(size=args.concurrency, tools=[calculator, current_time], callback_handler=None)
+    summary = asyncio.run(run_batch(args.input, args.output, pool, args.id_field, args.prompt_field))
+    print(json.dumps(summary))
@@ -0,0 +1,160 @@
+"""
+Shared Bedrock Clients
+
+- Every BedrockModel normally builds its own bedrock-runtime client, each with its own HTTP connection pool, so
+  connections (and their TLS handshakes) aren't reused across models and agents
+- BedrockClientRegistry hands out one client per region / endpoint / credentials / client config for the whole
+  process; all models and agents using it share that client's connection pool
+- Connection pool size (max_pool_connections) and TCP keep-alive are set once on the registry
+- stats() shows pool utilization per client: connections in use, idle, created, and requests served
+- SharedBedrockModel is a BedrockModel that takes its client from a registry instead of building one
+
+Usage:
+    model = SharedBedrockModel(region_name="us-east-1", temperature=0.3)   # uses bedrock_clients
+    agent = Agent(model=model)
+
+    print(bedrock_clients.stats())
+"""
+
+import os
+import threading
+from typing import Any, Optional
+
+import boto3
+from botocore.config import Config as BotocoreConfig
+from botocore.credentials import RefreshableCredentials
+from strands.models import BedrockModel
+from strands.models.bedrock import DEFAULT_BEDROCK_REGION, DEFAULT_READ_TIMEOUT
+
+
+class BedrockClientRegistry:
+    """Process-wide cache of bedrock-runtime clients, keyed by region, endpoint, credentials and client config."""
+
+    def __init__(self, max_pool_connections: int = 50, tcp_keepalive: bool = True):
+        self.max_pool_connections = max_pool_connections
+        self.tcp_keepalive = tcp_keepalive
+        self._clients: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.clients_created = 0
+
+    def client(
+        self,
+        boto_session: Optional[boto3.Session] = None,
+        region_name: Optional[str] = None,
+        boto_client_config: Optional[BotocoreConfig] = None,
+        endpoint_url: Optional[str] = None,
+    ) -> Any:
+        """The shared client for these settings, created on first use."""
+        session = boto_session or boto3.Session()
+        region = region_name or session.region_name or os.environ.get("AWS_REGION") or DEFAULT_BEDROCK_REGION
+
+        # Same user agent handling as BedrockModel
+        if boto_client_config:
+            user_agent = getattr(boto_client_config, "user_agent_extra", None)
+            user_agent = f"{user_agent} strands-agents" if user_agent else "strands-agents"
+            config = boto_client_config.merge(BotocoreConfig(user_agent_extra=user_agent))
+        else:
+            config = BotocoreConfig(user_agent_extra="strands-agents", read_timeout=DEFAULT_READ_TIMEOUT)
+        # Pool settings are the registry's unless the caller set them explicitly
+        defaults = BotocoreConfig(max_pool_connections=self.max_pool_connections, tcp_keepalive=self.tcp_keepalive)
+        config = defaults.merge(config)
+
+        key = (region, endpoint_url, _credentials_key(session), _config_key(config))
+        with self._lock:
+            self.lookups += 1
+            client = self._clients.get(key)
+            if client is None:
+                # Client creation isn't thread-safe on a shared session, so it happens under the lock
+                client = session.client(
+                    service_name="bedrock-runtime", config=config, endpoint_url=endpoint_url, region_name=region
+                )
+                self._clients[key] = client
+                self.clients_created += 1
+            return client
+
+    def stats(self) -> dict[str, Any]:
+        """Totals plus per-client connection pool utilization."""
+        with self._lock:
+            clients = list(self._clients.items())
+
+        per_client = []
+        for (region, endpoint_url, _, _), client in clients:
+            pools = _connection_pools(client)
+            in_use = sum(pool.pool.maxsize - pool.pool.qsize() for pool in pools if pool.pool is not None)
+            idle = sum(
+                sum(1 for conn in list(pool.pool.queue) if conn is not None) for pool in pools if pool.pool is not None
+            )
+            per_client.append({
+                "region": region,
+                "endpoint_url": endpoint_url or client.meta.endpoint_url,
+                "max_pool_connections": client.meta.config.max_pool_connections,
+                "connections_in_use": in_use,
+                "connections_idle": idle,
+                "connections_created": sum(pool.num_connections for pool in pools),
+                "requests": sum(pool.num_requests for pool in pools),
+            })
+
+        return {
+            "clients": len(clients),
+            "clients_created": self.clients_created,
+            "lookups": self.lookups,
+            "connections_in_use": sum(c["connections_in_use"] for c in per_client),
+            "connections_idle": sum(c["connections_idle"] for c in per_client),
+            "connections_created": sum(c["connections_created"] for c in per_client),
+            "requests": sum(c["requests"] for c in per_client),
+            "per_client": per_client,
+        }
+
+
+def _credentials_key(session: boto3.Session) -> tuple:
+    credentials = session.get_credentials()
+    if credentials is None:
+        return (session.profile_name, None)
+    if isinstance(credentials, RefreshableCredentials):
+        # Rotating credentials refresh inside the client; key on where they come from, not their current value
+        return (session.profile_name, credentials.method)
+    frozen = credentials.get_frozen_credentials()
+    return (session.profile_name, credentials.method, frozen.access_key, frozen.token)
+
+
+def _config_key(config: BotocoreConfig) -> str:
+    return repr(sorted(config._user_provided_options.items(), key=lambda item: item[0]))
+
+
+def _connection_pools(client: Any) -> list[Any]:
+    """The urllib3 connection pools behind a boto client (botocore internals, read-only)."""
+    http_session = client._endpoint.http_session
+    managers = [http_session._manager, *http_session._proxy_managers.values()]
+    return [pool for manager in managers for pool in list(manager.pools._container.values())]
+
+
+# Shared by every SharedBedrockModel in the process unless one is given its own registry
+bedrock_clients = BedrockClientRegistry()
+
+
+class SharedBedrockModel(BedrockModel):
+    """BedrockModel whose client comes from a BedrockClientRegistry instead of being built per instance."""
+
+    def __init__(
+        self,
+        *,
+        registry: Optional[BedrockClientRegistry] = None,
+        boto_session: Optional[boto3.Session] = None,
+        boto_client_config: Optional[BotocoreConfig] = None,
+        region_name: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        **model_config: Any,
+    ):
+        if region_name and boto_session:
+            raise ValueError("Cannot specify both `region_name` and `boto_session`.")
+
+        self.registry = registry or bedrock_clients
+        self.client = self.registry.client(boto_session, region_name, boto_client_config, endpoint_url)
+
+        # Same config setup as BedrockModel.__init__, minus building a client
+        self.config = BedrockModel.BedrockConfig(
+            model_id=BedrockModel._get_default_model_with_warning(self.client.meta.region_name, model_config),
+            include_tool_result_status="auto",
+        )
+        self.update_config(**model_config)
@@ -0,0 +1,248 @@
+"""
+Request Cancellation & Deadlines
+
+- A CancellationScope follows one request through the agent loop (model cycles + tool calls)
+- The scope is cancelled when:
+    - the client disconnects (the HTTP handler calls scope.cancel("client_disconnected"))
+    - the request deadline passes (a timer fires scope.cancel("deadline_exceeded"))
+- Cancelling a scope:
+    - closes any in-flight Bedrock ConverseStream, so the worker thread stops reading (and paying for) tokens
+    - cancels the task consuming agent.stream_async(), which raises RequestCancelled to the consumer
+    - makes CancellationHooks refuse any new model call or tool call for that request
+- Sync tools run in worker threads and can't be interrupted mid-call; their results are abandoned and counted
+
+Wiring:
+    install_bedrock_cancellation(bedrock_model)       # once per model / boto client
+    agent = Agent(..., hooks=[CancellationHooks()])   # once per agent
+
+    scope = CancellationScope(timeout=5.0)
+    with scope.activate():
+        async for event in scope.guard(agent.stream_async(prompt)):
+            ...
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from strands.experimental.hooks import (
+    AfterModelInvocationEvent,
+    AfterToolInvocationEvent,
+    BeforeModelInvocationEvent,
+    BeforeToolInvocationEvent,
+)
+from strands.hooks import HookProvider, HookRegistry
+from strands.tools.tools import PythonAgentTool
+
+# Scope of the request running in the current task; copied into asyncio.to_thread() workers, including boto's
+_current_scope: contextvars.ContextVar[Optional["CancellationScope"]] = contextvars.ContextVar(
+    "cancellation_scope", default=None
+)
+
+# Process-wide counters of cancelled work
+cancellation_metrics: dict[str, Any] = {
+    "requests_cancelled": {"client_disconnected": 0, "deadline_exceeded": 0},
+    "model_streams_closed": 0,
+    "model_calls_refused": 0,
+    "tool_calls_refused": 0,
+    "tool_calls_abandoned": 0,
+}
+
+
+class RequestCancelled(Exception):
+    """The request was cancelled (client went away or its deadline passed)."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Request cancelled: {reason}")
+        self.reason = reason
+
+
+def current_scope() -> Optional["CancellationScope"]:
+    return _current_scope.get()
+
+
+class CancellationScope:
+    """Cancellation state and deadline for a single request."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None
+        self.tools_in_flight = 0
+        self._closers: list[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._done = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None if there is no deadline)."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def check(self) -> None:
+        """Raise RequestCancelled if the request was cancelled or has run out of time."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self.cancel("deadline_exceeded")
+        if self.cancelled:
+            raise RequestCancelled(self.reason)
+
+    def add_closer(self, closer: Callable[[], None]) -> None:
+        """Register something to close on cancellation (e.g. a model response stream)."""
+        if self.cancelled:
+            closer()
+        else:
+            self._closers.append(closer)
+
+    def clear_closers(self) -> None:
+        """Forget registered closers once the things they close have finished on their own."""
+        self._closers.clear()
+
+    def cancel(self, reason: str) -> None:
+        """Stop all work for this request. Safe to call more than once or after completion."""
+        if self._done or self.cancelled:
+            return
+
+        self.reason = reason
+        requests_cancelled = cancellation_metrics["requests_cancelled"]
+        requests_cancelled[reason] = requests_cancelled.get(reason, 0) + 1
+        cancellation_metrics["tool_calls_abandoned"] += self.tools_in_flight
+
+        for close in self._closers:
+            try:
+                close()
+                cancellation_metrics["model_streams_closed"] += 1
+            except Exception:
+                pass
+        self._closers.clear()
+
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    @contextmanager
+    def activate(self) -> Iterator["CancellationScope"]:
+        """Make this the current scope for the block (and any tasks / threads it starts)."""
+        token = _current_scope.set(self)
+        try:
+            yield self
+        finally:
+            _current_scope.reset(token)
+
+    async def guard(self, events: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Iterate an agent stream under this scope, raising RequestCancelled once it is cancelled."""
+        self._task = asyncio.current_task()
+        remaining = self.remaining()
+        if remaining is not None:
+            self._timer = asyncio.get_running_loop().call_later(max(0.0, remaining), self.cancel, "deadline_exceeded")
+
+        finished = False
+        try:
+            self.check()
+            async for event in events:
+                yield event
+                self.check()
+            finished = True
+        except asyncio.CancelledError:
+            if not self.cancelled:
+                # Cancelled by our caller (e.g. the response was torn down) - leave cancel() to them
+                raise
+            # Cancelled by us - report it as a normal error
+            self._task.uncancel()
+            raise RequestCancelled(self.reason) from None
+        except Exception:
+            finished = True
+            raise
+        finally:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._task = None
+            if finished:
+                self._done = True
+                self._closers.clear()
+
+
+class CancellationHooks(HookProvider):
+    """Refuses new model and tool calls once the current request is cancelled or past its deadline."""
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelInvocationEvent, self._before_model)
+        registry.add_callback(AfterModelInvocationEvent, self._after_model)
+        registry.add_callback(BeforeToolInvocationEvent, self._before_tool)
+        registry.add_callback(AfterToolInvocationEvent, self._after_tool)
+
+    def _before_model(self, event: BeforeModelInvocationEvent) -> None:
+        scope = current_scope()
+        if scope is None:
+            return
+        try:
+            scope.check()
+        except RequestCancelled:
+            cancellation_metrics["model_calls_refused"] += 1
+            raise
+
+    def _after_model(self, event: AfterModelInvocationEvent) -> None:
+        # The model stream for this cycle is finished, nothing left to close
+        scope = current_scope()
+        if scope is not None:
+            scope.clear_closers()
+
+    def _before_tool(self, event: BeforeToolInvocationEvent) -> None:
+        scope = current_scope()
+        if scope is None:
+            return
+        try:
+            scope.check()
+        except RequestCancelled as e:
+            cancellation_metrics["tool_calls_refused"] += 1
+            event.selected_tool = _cancelled_tool(event.tool_use["name"], e.reason)
+            return
+        scope.tools_in_flight += 1
+
+    def _after_tool(self, event: AfterToolInvocationEvent) -> None:
+        scope = current_scope()
+        if scope is not None and not scope.cancelled:
+            scope.tools_in_flight -= 1
+
+
+def _cancelled_tool(name: str, reason: str) -> PythonAgentTool:
+    """Stand-in tool that returns an error result instead of running the real one."""
+
+    def cancelled(tool_use: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        return {
+            "toolUseId": tool_use["toolUseId"],
+            "status": "error",
+            "content": [{"text": f"Tool call cancelled: {reason}"}],
+        }
+
+    return PythonAgentTool(name, {"name": name, "description": "cancelled", "inputSchema": {"json": {}}}, cancelled)
+
+
+def install_bedrock_cancellation(model: Any) -> None:
+    """Hook a BedrockModel's boto client so in-flight streams can be closed by the request's scope."""
+    events = model.client.meta.events
+
+    def before_call(**kwargs: Any) -> None:
+        scope = current_scope()
+        if scope is not None:
+            scope.check()
+
+    def after_call(parsed: dict[str, Any], **kwargs: Any) -> None:
+        scope = current_scope()
+        stream = parsed.get("stream")
+        if scope is not None and stream is not None:
+            scope.add_closer(stream.close)
+
+    # unique_id keeps a client shared by several models (see bedrock_clients.py) from being hooked twice
+    events.register("before-call.bedrock-runtime.ConverseStream", before_call, unique_id="cancellation-before-stream")
+    events.register("before-call.bedrock-runtime.Converse", before_call, unique_id="cancellation-before-converse")
+    events.register("after-call.bedrock-runtime.ConverseStream", after_call, unique_id="cancellation-after-stream")
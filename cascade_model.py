@@ -0,0 +1,247 @@
+"""
+Model Cascade - cheap model first, escalate when needed
+
+- CascadeModel tries a fast / cheap model first (e.g. claude-3-5-haiku) and only calls the larger model when a
+  check fires:
+    - before the call (pre_checks), e.g. tool complexity: the turn already went through many tool rounds
+    - after the cheap response (post_checks), e.g. low confidence ("I'm not sure", empty or truncated answer) or a
+      tool call whose input doesn't match the tool's schema
+- With post_checks, the cheap tier's response is held back until it has been checked (cheap models are fast, so
+  simple requests still finish well before the large model would have); without them it streams straight through
+- The last tier always streams straight through
+- stats() records per tier: calls, answered, escalations by reason, latency, tokens and estimated cost
+
+Usage:
+    model = CascadeModel(
+        [Tier("haiku", AnthropicModel(model_id="claude-3-5-haiku-20241022", max_tokens=1000), 0.8, 4.0),
+         Tier("sonnet", BedrockModel(), 3.0, 15.0)],
+        pre_checks=[tool_complexity(max_tool_rounds=2)],
+        post_checks=[low_confidence(), invalid_tool_use()],
+    )
+    agent = Agent(model=model, tools=[...])
+    print(model.stats())
+"""
+
+import logging
+import time
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Iterable, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+from strands.event_loop import streaming
+from strands.models import Model
+from strands.types.content import Message, Messages
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolChoice, ToolSpec
+
+from model_utils import structured_output
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# (messages, tool_specs) -> reason to escalate, or None
+PreCheck = Callable[[Messages, Optional[list[ToolSpec]]], Optional[str]]
+# (response message, stop_reason, tool_specs) -> reason to escalate, or None
+PostCheck = Callable[[Message, str, Optional[list[ToolSpec]]], Optional[str]]
+
+HEDGING_PHRASES = ("i'm not sure", "i am not sure", "i don't know", "i cannot determine", "unclear", "i'm unable to")
+
+
+def tool_complexity(max_tool_rounds: int = 2, max_tools: int = 8) -> PreCheck:
+    """Escalate once the current turn has gone through more than max_tool_rounds tool rounds, or with many tools."""
+
+    def check(messages: Messages, tool_specs: Optional[list[ToolSpec]]) -> Optional[str]:
+        if tool_specs and len(tool_specs) > max_tools:
+            return "many_tools"
+        rounds = 0
+        for message in reversed(messages):
+            if message["role"] != "user":
+                continue
+            if not any("toolResult" in block for block in message["content"]):
+                break
+            rounds += 1
+        return "tool_rounds" if rounds > max_tool_rounds else None
+
+    return check
+
+
+def low_confidence(phrases: Iterable[str] = HEDGING_PHRASES, min_chars: int = 1) -> PostCheck:
+    """Escalate on a hedging, empty or truncated answer."""
+    phrases = tuple(phrase.lower() for phrase in phrases)
+
+    def check(message: Message, stop_reason: str, tool_specs: Optional[list[ToolSpec]]) -> Optional[str]:
+        if stop_reason == "max_tokens":
+            return "truncated"
+        if stop_reason == "tool_use":
+            return None
+        text = "".join(block.get("text", "") for block in message["content"]).strip()
+        if len(text) < min_chars:
+            return "empty"
+        lowered = text.lower()
+        return "low_confidence" if any(phrase in lowered for phrase in phrases) else None
+
+    return check
+
+
+def invalid_tool_use() -> PostCheck:
+    """Escalate when a tool call names an unknown tool or misses required input fields."""
+
+    def check(message: Message, stop_reason: str, tool_specs: Optional[list[ToolSpec]]) -> Optional[str]:
+        specs = {spec["name"]: spec for spec in tool_specs or []}
+        for block in message["content"]:
+            if "toolUse" not in block:
+                continue
+            tool_use = block["toolUse"]
+            spec = specs.get(tool_use["name"])
+            if spec is None:
+                return "unknown_tool"
+            tool_input = tool_use.get("input")
+            required = spec["inputSchema"].get("json", {}).get("required", [])
+            if not isinstance(tool_input, dict) or any(field not in tool_input for field in required):
+                return "invalid_tool_input"
+        return None
+
+    return check
+
+
+class Tier:
+    """A model in the cascade, with prices per million input / output tokens for cost estimates."""
+
+    def __init__(self, name: str, model: Model, input_price: float = 0.0, output_price: float = 0.0):
+        self.name = name
+        self.model = model
+        self.input_price = input_price
+        self.output_price = output_price
+        self.calls = 0
+        self.answered = 0
+        self.escalations: dict[str, int] = {}
+        self.total_latency = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, latency: float, usage: Optional[dict[str, Any]]) -> None:
+        self.calls += 1
+        self.total_latency += latency
+        if usage:
+            self.input_tokens += usage.get("inputTokens", 0)
+            self.output_tokens += usage.get("outputTokens", 0)
+
+    @property
+    def cost(self) -> float:
+        return (self.input_tokens * self.input_price + self.output_tokens * self.output_price) / 1_000_000
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "answered": self.answered,
+            "escalations": dict(self.escalations),
+            "average_latency_s": round(self.total_latency / self.calls, 4) if self.calls else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_cost": round(self.cost, 6),
+        }
+
+
+class CascadeModel(Model):
+    """Tries cheaper tiers first and escalates to the next tier when a check fires."""
+
+    def __init__(
+        self,
+        tiers: list[Tier],
+        pre_checks: Optional[list[PreCheck]] = None,
+        post_checks: Optional[list[PostCheck]] = None,
+    ):
+        if not tiers:
+            raise ValueError("at least one tier is required")
+        self.tiers = tiers
+        self.pre_checks = pre_checks or []
+        self.post_checks = post_checks or []
+
+    def update_config(self, **model_config: Any) -> None:
+        for tier in self.tiers:
+            tier.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        # The last tier is the model the cascade stands in for
+        return self.tiers[-1].model.get_config()
+
+    @property
+    def config(self) -> Any:
+        return self.get_config()
+
+    def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[dict[str, Union[T, Any]], None]:
+        return structured_output(self, output_model, prompt, system_prompt, **kwargs)
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[list[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: ToolChoice | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        start_index = 0
+        for check in self.pre_checks:
+            reason = check(messages, tool_specs)
+            if reason is not None:
+                self.tiers[0].escalations[reason] = self.tiers[0].escalations.get(reason, 0) + 1
+                start_index = len(self.tiers) - 1
+                break
+
+        for index in range(start_index, len(self.tiers)):
+            tier = self.tiers[index]
+            last = index == len(self.tiers) - 1
+            events = tier.model.stream(messages, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs)
+            start = time.monotonic()
+            usage = None
+
+            if last or not self.post_checks:
+                async for event in events:
+                    if "metadata" in event:
+                        usage = event["metadata"].get("usage")
+                    yield event
+                tier.record(time.monotonic() - start, usage)
+                tier.answered += 1
+                return
+
+            # Hold the response back until the post checks have seen it
+            buffered = [event async for event in events]
+            usage = next((e["metadata"].get("usage") for e in buffered if "metadata" in e), None)
+            tier.record(time.monotonic() - start, usage)
+
+            reason = await self._post_check(buffered, tool_specs)
+            if reason is None:
+                tier.answered += 1
+                for event in buffered:
+                    yield event
+                return
+
+            tier.escalations[reason] = tier.escalations.get(reason, 0) + 1
+            logger.debug("tier=<%s>, reason=<%s> | escalating to the next tier", tier.name, reason)
+
+    async def _post_check(self, buffered: list[StreamEvent], tool_specs: Optional[list[ToolSpec]]) -> Optional[str]:
+        async def replay() -> AsyncIterable[StreamEvent]:
+            for event in buffered:
+                yield event
+
+        async for event in streaming.process_stream(replay()):
+            pass
+        stop_reason, message, _, _ = event["stop"]
+
+        for check in self.post_checks:
+            reason = check(message, stop_reason, tool_specs)
+            if reason is not None:
+                return reason
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        calls = sum(tier.answered for tier in self.tiers)
+        return {
+            "requests": calls,
+            "answered_by_first_tier": round(self.tiers[0].answered / calls, 4) if calls else 0.0,
+            "estimated_cost": round(sum(tier.cost for tier in self.tiers), 6),
+            "tiers": {tier.name: tier.stats() for tier in self.tiers},
+        }
@@ -0,0 +1,194 @@
+"""
+Non-blocking Logging Pipeline
+
+- Log calls only put the record on a bounded queue; a background thread formats and writes it, so DEBUG logging
+  stays off the event loop (and out of streaming latency)
+- Formatting is lazy: the %-args (e.g. full message dicts) are only turned into text on the writer thread, and only
+  for records that are actually written. Objects changed after the log call may show their later state
+- Per-logger sampling and rate limits drop records before they are queued (WARNING and above are always kept)
+- If the queue is full, records are dropped and counted instead of blocking the caller
+- Plain text or structured JSON lines (one object per record, including `extra=` fields)
+
+Usage:
+    pipeline = configure_logging(
+        level=logging.DEBUG,
+        loggers=["strands"],
+        json_output=True,
+        sample_rates={"strands.event_loop": 0.1},    # keep 10% of event loop debug records
+        rate_limits={"strands": 200},                # at most 200 records/second for strands.*
+    )
+    ...
+    print(pipeline.stats())
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterable, Optional, TextIO
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _longest_prefix(name: str, settings: dict[str, float]) -> Optional[str]:
+    """The most specific logger prefix in settings that matches name ("strands" matches "strands.agent")."""
+    while name:
+        if name in settings:
+            return name
+        name = name.rpartition(".")[0]
+    return None
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of records and caps records per second, per logger prefix."""
+
+    def __init__(self, sample_rates: Optional[dict[str, float]] = None, rate_limits: Optional[dict[str, float]] = None):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.rate_limits = rate_limits or {}
+        # prefix -> [tokens, last refill]
+        self._buckets: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        prefix = _longest_prefix(record.name, self.sample_rates)
+        if prefix is not None and random.random() >= self.sample_rates[prefix]:
+            self.sampled_out += 1
+            return False
+
+        prefix = _longest_prefix(record.name, self.rate_limits)
+        if prefix is not None and not self._take(prefix, self.rate_limits[prefix]):
+            self.rate_limited += 1
+            return False
+
+        return True
+
+    def _take(self, prefix: str, rate: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(prefix, [rate, now])
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread and never blocks."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the message here, on the caller's thread; the listener does it instead
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LogPipeline:
+    """Queue handler on the calling side, listener thread writing to the real handler."""
+
+    def __init__(
+        self,
+        handler: logging.Handler,
+        max_queue: int = 10_000,
+        sampling: Optional[SamplingFilter] = None,
+    ):
+        self.queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=max_queue)
+        self.queue_handler = LazyQueueHandler(self.queue)
+        self.sampling = sampling
+        if sampling is not None:
+            self.queue_handler.addFilter(sampling)
+        self.listener = QueueListener(self.queue, handler, respect_handler_level=True)
+        self._loggers: list[logging.Logger] = []
+        self._running = False
+
+    def attach(self, logger: logging.Logger) -> None:
+        logger.addHandler(self.queue_handler)
+        self._loggers.append(logger)
+
+    def start(self) -> None:
+        self.listener.start()
+        self._running = True
+
+    def stop(self) -> None:
+        """Detach from the loggers and write out everything still queued."""
+        for logger in self._loggers:
+            logger.removeHandler(self.queue_handler)
+        self._loggers.clear()
+        if self._running:
+            self._running = False
+            self.listener.stop()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped_queue_full": self.queue_handler.dropped,
+            "sampled_out": self.sampling.sampled_out if self.sampling else 0,
+            "rate_limited": self.sampling.rate_limited if self.sampling else 0,
+        }
+
+
+def configure_logging(
+    level: int = logging.DEBUG,
+    loggers: Iterable[str] = ("strands",),
+    json_output: bool = False,
+    sample_rates: Optional[dict[str, float]] = None,
+    rate_limits: Optional[dict[str, float]] = None,
+    max_queue: int = 10_000,
+    stream: TextIO = sys.stderr,
+) -> LogPipeline:
+    """Route the given loggers through a background writer; replaces a synchronous StreamHandler setup."""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter() if json_output else logging.Formatter("%(levelname)s | %(name)s | %(message)s"))
+
+    sampling = SamplingFilter(sample_rates, rate_limits) if sample_rates or rate_limits else None
+    pipeline = LogPipeline(handler, max_queue=max_queue, sampling=sampling)
+    for name in loggers:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        # Don't also hand the records to synchronous root handlers
+        logger.propagate = False
+        pipeline.attach(logger)
+
+    pipeline.start()
+    atexit.register(pipeline.stop)
+    return pipeline
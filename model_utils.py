@@ -0,0 +1,90 @@
+"""
+Model Utilities
+
+- Helpers shared by the model wrappers in this project (replay_model, prompt_cache, rate_limiter, region_router,
+  cascade_model, structured_batch) and the conversation managers (token_budget, retrieval_memory)
+- structured_output() implements Model.structured_output with a forced tool call on model.stream(), the same way
+  BedrockModel does it, so a wrapper only has to implement stream()
+- estimate_tokens() / estimate_request_tokens() approximate token counts (~4 characters per token, media blocks at
+  a flat cost) where calling a tokenizer on every request would cost more than the estimate is worth
+
+Usage:
+    class MyWrapper(Model):
+        def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+            return structured_output(self, output_model, prompt, system_prompt, **kwargs)
+"""
+
+import json
+from typing import Any, AsyncGenerator, Optional, Type, TypeVar, Union, cast
+
+from pydantic import BaseModel
+from strands.event_loop import streaming
+from strands.models import Model
+from strands.tools.structured_output import convert_pydantic_to_tool_spec
+from strands.types.content import Messages
+from strands.types.tools import ToolChoice, ToolSpec
+
+T = TypeVar("T", bound=BaseModel)
+
+# Rough flat cost of a media block
+_MEDIA_TOKENS = 1600
+
+
+async def structured_output(
+    model: Model,
+    output_model: Type[T],
+    prompt: Messages,
+    system_prompt: Optional[str],
+    tool_spec: Optional[ToolSpec] = None,
+    **kwargs: Any,
+) -> AsyncGenerator[dict[str, Union[T, Any]], None]:
+    """Structured output via a forced tool call on model.stream(), the same way BedrockModel does it.
+
+    Pass tool_spec to reuse a spec converted once from output_model instead of converting it on every call.
+    """
+    tool_spec = tool_spec or convert_pydantic_to_tool_spec(output_model)
+    response = model.stream(
+        messages=prompt,
+        tool_specs=[tool_spec],
+        system_prompt=system_prompt,
+        tool_choice=cast(ToolChoice, {"any": {}}),
+        **kwargs,
+    )
+    async for event in streaming.process_stream(response):
+        yield event
+
+    stop_reason, message, _, _ = event["stop"]
+    if stop_reason != "tool_use":
+        raise ValueError(f'Model returned stop_reason: {stop_reason} instead of "tool_use".')
+
+    for block in message["content"]:
+        if block.get("toolUse") and block["toolUse"]["name"] == tool_spec["name"]:
+            yield {"output": output_model(**block["toolUse"]["input"])}
+            return
+
+    raise ValueError("No valid tool use or tool use input was found in the model response.")
+
+
+def estimate_tokens(content: Any) -> int:
+    """Approximate token count of a message content list, system prompt or tool specs (~4 characters per token)."""
+    if isinstance(content, str):
+        return len(content) // 4
+    if isinstance(content, list) and all(isinstance(block, dict) for block in content):
+        total = 0
+        for block in content:
+            if "text" in block:
+                total += len(block["text"]) // 4
+            elif any(key in block for key in ("image", "document", "video")):
+                total += _MEDIA_TOKENS
+            else:
+                total += len(json.dumps(block, default=str)) // 4
+        return total
+    return len(json.dumps(content, default=str)) // 4
+
+
+def estimate_request_tokens(
+    messages: Messages, system_prompt: Optional[str], tool_specs: Optional[list[ToolSpec]]
+) -> int:
+    """Approximate input token count of a whole model request."""
+    total = sum(estimate_tokens(message["content"]) for message in messages)
+    return total + estimate_tokens(system_prompt or "") + estimate_tokens(tool_specs or []) + 1
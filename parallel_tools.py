@@ -0,0 +1,111 @@
+"""
+Parallel Tool Execution
+
+- When the model asks for several tools in one turn (e.g. current_time, calculator and letter_counter in agent.py),
+  strands' default ConcurrentToolExecutor already runs them at the same time, so the turn costs the slowest tool
+  instead of the sum of all; sync tools run on worker threads (the @tool decorator uses asyncio.to_thread), async
+  tools run on the event loop
+- ParallelToolExecutor is that executor with three additions, layered on it through super() so the concurrency
+  itself stays strands' own:
+    - max_concurrency caps how many tools of one turn run at once
+    - tool results are put back in the order the model requested them, not the order they finished
+    - each parallel batch adds a "Tool batch" trace under its cycle with the wall time, the summed tool time and the
+      resulting speedup (per-tool timing is in result.metrics.get_summary()["tool_usage"])
+- If the agent loop is torn down mid-batch (e.g. the request was cancelled), the remaining tools are cancelled
+
+Usage:
+    agent = Agent(tools=[...], tool_executor=ParallelToolExecutor(max_concurrency=4))
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Optional
+
+from strands.telemetry.metrics import Trace
+from strands.tools.executors import ConcurrentToolExecutor
+from strands.types._events import TypedEvent
+from strands.types.tools import ToolResult, ToolUse
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+
+class _Batch:
+    """State of one _execute call, shared by its tool tasks."""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks: list["asyncio.Task[Any]"] = []
+        self.durations: list[float] = []
+
+
+class ParallelToolExecutor(ConcurrentToolExecutor):
+    """ConcurrentToolExecutor with a concurrency cap, results in request order and a per-batch trace."""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        # id of the batch's own result list (passed to every _task of the batch) -> batch
+        self._batches: dict[int, _Batch] = {}
+
+    async def _execute(
+        self,
+        agent: "Agent",
+        tool_uses: list[ToolUse],
+        tool_results: list[ToolResult],
+        cycle_trace: Trace,
+        cycle_span: Any,
+        invocation_state: dict[str, Any],
+    ) -> AsyncGenerator[TypedEvent, None]:
+        batch = _Batch(self.max_concurrency or max(1, len(tool_uses)))
+        finished: list[ToolResult] = []
+        self._batches[id(finished)] = batch
+        batch_start = time.time()
+        try:
+            events = super()._execute(agent, tool_uses, finished, cycle_trace, cycle_span, invocation_state)
+            async for event in events:
+                yield event
+        finally:
+            del self._batches[id(finished)]
+            # If the agent loop is torn down (e.g. the request was cancelled), stop the remaining tools
+            for task in batch.tasks:
+                if not task.done():
+                    task.cancel()
+
+        # Surface failures that happened outside the tool itself (e.g. in a hook)
+        await asyncio.gather(*batch.tasks)
+
+        order = {tool_use["toolUseId"]: index for index, tool_use in enumerate(tool_uses)}
+        tool_results.extend(sorted(finished, key=lambda result: order.get(result["toolUseId"], len(order))))
+
+        if len(tool_uses) > 1:
+            wall_time = time.time() - batch_start
+            batch_trace = Trace(
+                "Tool batch",
+                parent_id=cycle_trace.id,
+                start_time=batch_start,
+                metadata={
+                    "tools": [tool_use["name"] for tool_use in tool_uses],
+                    "max_concurrency": self.max_concurrency or len(tool_uses),
+                    "wall_time": wall_time,
+                    "sum_tool_time": sum(batch.durations),
+                    "max_tool_time": max(batch.durations, default=0.0),
+                    "speedup": sum(batch.durations) / wall_time if wall_time else 1.0,
+                },
+            )
+            batch_trace.end()
+            cycle_trace.add_child(batch_trace)
+
+    async def _task(self, agent: "Agent", tool_use: ToolUse, tool_results: list[ToolResult], *args: Any) -> None:
+        """Run one tool of the batch within its concurrency cap."""
+        batch = self._batches[id(tool_results)]
+        task = asyncio.current_task()
+        if task is not None:
+            batch.tasks.append(task)
+        async with batch.semaphore:
+            start = time.perf_counter()
+            try:
+                await super()._task(agent, tool_use, tool_results, *args)
+            finally:
+                batch.durations.append(time.perf_counter() - start)
@@ -0,0 +1,223 @@
+"""
+Automatic Prompt Cache Checkpoints
+
+- CachePlanningModel wraps a BedrockModel and decides on every call where Bedrock cache checkpoints go, instead of
+  setting cache_prompt / cache_tools / cachePoint blocks by hand (see the caching notes in strands-providers.py)
+- Checkpoints go on stable prefixes, in prefix order: the tool list, the system prompt, then message boundaries
+- A checkpoint is only placed once at least min_tokens (estimated) have accumulated since the previous one, and
+  never more than max_checkpoints per request (Bedrock allows 4)
+- Message checkpoints are picked greedily from the start of the conversation, so the boundaries chosen for a prefix
+  stay the same as the conversation grows; each request keeps the most recent ones - the newest is written, the
+  older ones are read back from earlier turns - so the checkpoints move forward with the conversation
+- The agent's messages are not modified; checkpoints are added to a copy for the request
+- The tool and system checkpoints are added to each request's parameters by a hook on the boto client (the request's
+  plan is passed to it in a context variable), not through the shared cache_tools / cache_prompt config, so agents
+  sharing one model (e.g. an AgentPool) don't change each other's requests; those config keys are ignored
+- Cache read / write tokens and the estimated savings (in input-token equivalents) are counted per request and in
+  total; cache_report() gives the same for an AgentResult's usage
+
+Usage:
+    model = CachePlanningModel(BedrockModel(), min_tokens=1024)
+    agent = Agent(model=model, system_prompt=LONG_SYSTEM_PROMPT, tools=[...])
+    result = agent("...")
+    print(cache_report(result.metrics.accumulated_usage), model.stats())
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, AsyncIterable, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import ContentBlock, Messages
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolChoice, ToolSpec
+
+from model_utils import estimate_tokens, structured_output
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Bedrock prices cache reads at 10% and cache writes at 125% of regular input tokens
+CACHE_READ_PRICE = 0.1
+CACHE_WRITE_PRICE = 1.25
+
+CACHE_POINT: ContentBlock = {"cachePoint": {"type": "default"}}
+
+# Plan of the request being sent; BedrockModel builds the request in a worker thread, which gets a copy of the context
+_current_plan: ContextVar[Optional["CacheCheckpointPlan"]] = ContextVar("prompt_cache_plan", default=None)
+
+
+def cache_report(usage: dict[str, Any]) -> dict[str, Any]:
+    """Cache tokens and estimated savings for a usage dict (e.g. result.metrics.accumulated_usage)."""
+    read = usage.get("cacheReadInputTokens", 0)
+    write = usage.get("cacheWriteInputTokens", 0)
+    uncached = usage.get("inputTokens", 0)
+    total_input = read + write + uncached
+    saved = read * (1 - CACHE_READ_PRICE) - write * (CACHE_WRITE_PRICE - 1)
+    return {
+        "input_tokens": uncached,
+        "cache_read_tokens": read,
+        "cache_write_tokens": write,
+        "cache_hit_ratio": round(read / total_input, 4) if total_input else 0.0,
+        "saved_input_token_equivalents": round(saved, 1),
+    }
+
+
+class CacheCheckpointPlan:
+    """Where checkpoints go for one request."""
+
+    def __init__(self, cache_tools: bool, cache_system: bool, message_indexes: list[int]):
+        self.cache_tools = cache_tools
+        self.cache_system = cache_system
+        self.message_indexes = message_indexes
+
+    @property
+    def count(self) -> int:
+        return int(self.cache_tools) + int(self.cache_system) + len(self.message_indexes)
+
+
+def plan_checkpoints(
+    messages: Messages,
+    tool_specs: Optional[list[ToolSpec]],
+    system_prompt: Optional[str],
+    min_tokens: int = 1024,
+    max_checkpoints: int = 4,
+) -> CacheCheckpointPlan:
+    """Pick checkpoint positions for one request (see module docstring)."""
+    # cachePoint blocks already in the messages use up part of the budget and start a new segment
+    existing = {index for index, message in enumerate(messages) if any("cachePoint" in b for b in message["content"])}
+    budget = max_checkpoints - len(existing)
+    pending = 0
+
+    cache_tools = False
+    if tool_specs:
+        pending += estimate_tokens(tool_specs)
+        if pending >= min_tokens and budget > 0:
+            cache_tools, pending, budget = True, 0, budget - 1
+
+    cache_system = False
+    if system_prompt:
+        pending += estimate_tokens(system_prompt)
+        if pending >= min_tokens and budget > 0:
+            cache_system, pending, budget = True, 0, budget - 1
+
+    boundaries = []
+    for index, message in enumerate(messages):
+        pending += estimate_tokens(message["content"])
+        if index in existing:
+            pending = 0
+        elif pending >= min_tokens:
+            boundaries.append(index)
+            pending = 0
+
+    return CacheCheckpointPlan(cache_tools, cache_system, boundaries[-budget:] if budget > 0 else [])
+
+
+def _bedrock_client(model: Any) -> Any:
+    """The boto client of a BedrockModel, or of the BedrockModel inside wrappers like RateLimitedModel."""
+    while model is not None:
+        client = getattr(model, "client", None)
+        if client is not None and hasattr(client, "meta"):
+            return client
+        model = getattr(model, "model", None)
+    raise ValueError("CachePlanningModel needs a BedrockModel, or a wrapper around one")
+
+
+def _place_cache_points(params: dict[str, Any], **kwargs: Any) -> None:
+    """boto before-parameter-build hook: set the tool and system checkpoints of the current request's plan."""
+    plan = _current_plan.get()
+    if plan is None:
+        return
+    system = [block for block in params.get("system", []) if "cachePoint" not in block]
+    params["system"] = [*system, CACHE_POINT] if plan.cache_system and system else system
+    tool_config = params.get("toolConfig")
+    if tool_config:
+        tools = [tool for tool in tool_config["tools"] if "cachePoint" not in tool]
+        tool_config["tools"] = [*tools, CACHE_POINT] if plan.cache_tools else tools
+
+
+class CachePlanningModel(Model):
+    """BedrockModel wrapper that places prompt cache checkpoints automatically."""
+
+    def __init__(self, model: Model, min_tokens: int = 1024, max_checkpoints: int = 4):
+        events = _bedrock_client(model).meta.events
+        # unique_id keeps a client shared by several models (see bedrock_clients.py) from being hooked twice
+        for operation in ("ConverseStream", "Converse"):
+            events.register(
+                f"before-parameter-build.bedrock-runtime.{operation}",
+                _place_cache_points,
+                unique_id=f"prompt-cache-{operation}",
+            )
+        self.model = model
+        self.min_tokens = min_tokens
+        self.max_checkpoints = max_checkpoints
+        self.requests = 0
+        self.totals = {"inputTokens": 0, "cacheReadInputTokens": 0, "cacheWriteInputTokens": 0}
+        self.last_request: dict[str, Any] = {}
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    @property
+    def config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[dict[str, Union[T, Any]], None]:
+        return structured_output(self, output_model, prompt, system_prompt, **kwargs)
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[list[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: ToolChoice | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        plan = plan_checkpoints(messages, tool_specs, system_prompt, self.min_tokens, self.max_checkpoints)
+
+        planned = list(messages)
+        for index in plan.message_indexes:
+            planned[index] = {**messages[index], "content": [*messages[index]["content"], CACHE_POINT]}
+        logger.debug(
+            "cache_tools=<%s>, cache_system=<%s>, message_checkpoints=<%s> | cache checkpoints planned",
+            plan.cache_tools,
+            plan.cache_system,
+            plan.message_indexes,
+        )
+
+        events = self.model.stream(planned, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs).__aiter__()
+        # The request (and any retry of it) is sent before the first event, so the plan only needs to be current
+        # until then; it is not kept across yields, where the caller's context may change
+        token = _current_plan.set(plan)
+        try:
+            event = await events.__anext__()
+        except StopAsyncIteration:
+            return
+        finally:
+            _current_plan.reset(token)
+
+        while True:
+            if "metadata" in event and "usage" in event["metadata"]:
+                self._record(event["metadata"]["usage"], plan)
+            yield event
+            try:
+                event = await events.__anext__()
+            except StopAsyncIteration:
+                return
+
+    def _record(self, usage: dict[str, Any], plan: CacheCheckpointPlan) -> None:
+        self.requests += 1
+        for key in self.totals:
+            self.totals[key] += usage.get(key, 0)
+        self.last_request = {**cache_report(usage), "checkpoints": plan.count}
+
+    def stats(self) -> dict[str, Any]:
+        return {"requests": self.requests, **cache_report(self.totals), "last_request": self.last_request}
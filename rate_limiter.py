@@ -0,0 +1,333 @@
+"""
+Adaptive Client-side Rate Limiter
+
+- One limiter shared by all models (and agents) in the process, with token buckets for requests per minute and
+  (optionally) tokens per minute
+- The rate adapts to throttling (AIMD): every throttled call halves it (at most once per decrease_interval),
+  every successful call adds back a small step, up to the configured maximum
+- Calls wait in a queue for capacity instead of failing; the queue is ordered by deadline (earliest first, taken
+  from the request's CancellationScope, see cancellation.py), calls without a deadline go last in arrival order
+- Like Bedrock's own quota accounting, a call reserves its estimated input tokens + max_tokens up front; the
+  difference to the actual usage is settled when the response finishes
+- A throttled call that hasn't streamed anything is queued again (at the reduced rate) instead of being raised; once
+  max_throttle_retries are used up it raises ThrottleRetriesExhausted rather than ModelThrottledException, because
+  the agent event loop retries ModelThrottledException itself (up to 6 attempts) and the two layers would multiply
+  (a throttle after the response started streaming is raised as is, for the event loop to retry)
+- The wrapped model's boto client must not retry on its own: botocore retries throttles on its own timing before
+  the limiter sees them, so one granted call becomes several HTTP calls and the rate is cut late or never. Build its
+  client with NO_RETRIES (retries={"total_max_attempts": 1}; note retries={"max_attempts": 1} still allows one
+  retry); RateLimitedModel logs a warning for a BedrockModel whose client retries
+- Works across event loops / threads (sync agent calls each run their own loop)
+- stats() shows the current rates, queue depth and wait times
+
+Usage:
+    model = RateLimitedModel(BedrockModel(boto_client_config=NO_RETRIES), shared_limiter)
+    agent = Agent(model=model)
+
+    print(shared_limiter.stats())
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Any, AsyncGenerator, AsyncIterable, Optional, Type, TypeVar, Union
+
+from botocore.config import Config as BotocoreConfig
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.exceptions import ModelThrottledException
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolChoice, ToolSpec
+
+from cancellation import current_scope
+from model_utils import estimate_request_tokens, structured_output
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Client config for models wrapped by RateLimitedModel: one attempt per call, throttles are retried by the limiter
+NO_RETRIES = BotocoreConfig(retries={"total_max_attempts": 1})
+
+
+class _Waiter:
+    def __init__(self, deadline: float, seq: int, tokens: int):
+        self.deadline = deadline
+        self.seq = seq
+        self.tokens = tokens
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+    def wake(self) -> None:
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+
+class _Bucket:
+    """Token bucket whose refill rate is scaled by the limiter's AIMD factor."""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.per_minute = per_minute
+        self.capacity = max(1.0, per_minute / 60 * burst_seconds)
+        self.available = self.capacity
+
+    def refill(self, elapsed: float, factor: float) -> None:
+        self.available = min(self.capacity, self.available + elapsed * self.per_minute / 60 * factor)
+
+    def wait_time(self, amount: float, factor: float) -> float:
+        """Seconds until amount is available (a cost above capacity only needs a full bucket)."""
+        needed = min(amount, self.capacity) - self.available
+        return max(0.0, needed / (self.per_minute / 60 * factor))
+
+
+class AdaptiveRateLimiter:
+    """Shared AIMD token-bucket limiter for requests and tokens per minute, with a deadline-ordered queue."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 100,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = 5.0,
+        min_rate_fraction: float = 0.05,
+        decrease_factor: float = 0.5,
+        increase_step: float = 0.02,
+        decrease_interval: float = 2.0,
+    ):
+        self.requests = _Bucket(requests_per_minute, burst_seconds)
+        self.tokens = _Bucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self.min_rate_fraction = min_rate_fraction
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.decrease_interval = decrease_interval
+
+        # Fraction of the configured rates currently allowed
+        self.factor = 1.0
+        self._last_decrease = 0.0
+        self._last_refill = time.monotonic()
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+        self.granted = 0
+        self.throttled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def acquire(self, tokens: int = 0, deadline: Optional[float] = None) -> float:
+        """Wait for one request slot and `tokens` tokens, earliest deadline first. Returns the seconds waited."""
+        start = time.monotonic()
+        waiter = _Waiter(deadline if deadline is not None else math.inf, next(self._seq), tokens)
+        with self._lock:
+            heapq.heappush(self._waiters, waiter)
+
+        try:
+            while True:
+                with self._lock:
+                    waiter.wakeup.clear()
+                    delay = self._try_grant(waiter)
+                if delay is None:
+                    break
+                try:
+                    await asyncio.wait_for(waiter.wakeup.wait(), None if math.isinf(delay) else delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                waiter.cancelled = True
+                self._wake_head()
+            raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self.granted += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def _try_grant(self, waiter: _Waiter) -> Optional[float]:
+        """Grant the waiter if it's first in line and capacity allows; otherwise how long to wait (inf: until woken)."""
+        self._refill()
+        while self._waiters and self._waiters[0].cancelled:
+            heapq.heappop(self._waiters)
+        if self._waiters[0] is not waiter:
+            return math.inf
+
+        delay = self.requests.wait_time(1, self.factor)
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.wait_time(waiter.tokens, self.factor))
+        if delay > 0:
+            return delay
+
+        self.requests.available -= 1
+        if self.tokens is not None:
+            self.tokens.available -= waiter.tokens
+        heapq.heappop(self._waiters)
+        self._wake_head()
+        return None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._last_refill = now - self._last_refill, now
+        self.requests.refill(elapsed, self.factor)
+        if self.tokens is not None:
+            self.tokens.refill(elapsed, self.factor)
+
+    def _wake_head(self) -> None:
+        while self._waiters and self._waiters[0].cancelled:
+            heapq.heappop(self._waiters)
+        if self._waiters:
+            self._waiters[0].wake()
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Correct a token reservation with the actual usage once the call has finished."""
+        if self.tokens is None or reserved == used:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens.available = min(self.tokens.capacity, self.tokens.available + reserved - used)
+            self._wake_head()
+
+    def on_success(self) -> None:
+        """Additive increase."""
+        with self._lock:
+            if self.factor < 1.0:
+                self._refill()
+                self.factor = min(1.0, self.factor + self.increase_step)
+                self._wake_head()
+
+    def on_throttle(self) -> None:
+        """Multiplicative decrease, once per decrease_interval so a burst of throttles counts as one signal."""
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+            self._last_decrease = now
+            self._refill()
+            self.factor = max(self.min_rate_fraction, self.factor * self.decrease_factor)
+        logger.debug("factor=<%s> | throttled, reducing rate", self.factor)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_fraction": round(self.factor, 3),
+                "requests_per_minute": round(self.requests.per_minute * self.factor, 1),
+                "tokens_per_minute": round(self.tokens.per_minute * self.factor, 1) if self.tokens else None,
+                "queue_depth": sum(1 for waiter in self._waiters if not waiter.cancelled),
+                "granted": self.granted,
+                "throttled": self.throttled,
+                "average_wait_seconds": round(self._total_wait / self.granted, 4) if self.granted else 0.0,
+                "max_wait_seconds": round(self._max_wait, 4),
+            }
+
+
+class ThrottleRetriesExhausted(Exception):
+    """Still throttled after max_throttle_retries; not a ModelThrottledException, so the event loop won't retry it."""
+
+
+# Shared by every RateLimitedModel in the process unless one is given its own limiter
+shared_limiter = AdaptiveRateLimiter()
+
+
+def _client_attempts(model: Model) -> Optional[int]:
+    """HTTP attempts the model's boto client makes per call (None if it has no boto client)."""
+    config = getattr(getattr(getattr(model, "client", None), "meta", None), "config", None)
+    if config is None:
+        return None
+    retries = config.retries or {}
+    if "total_max_attempts" in retries:
+        return retries["total_max_attempts"]
+    # botocore's defaults: legacy mode makes 5 attempts, standard and adaptive make 3
+    return 5 if retries.get("mode", "legacy") == "legacy" else 3
+
+
+class RateLimitedModel(Model):
+    """Model wrapper that takes every call through an AdaptiveRateLimiter."""
+
+    def __init__(
+        self,
+        model: Model,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        max_throttle_retries: int = 5,
+        default_max_tokens: int = 4096,
+    ):
+        self.model = model
+        self.limiter = limiter or shared_limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.default_max_tokens = default_max_tokens
+
+        attempts = _client_attempts(model)
+        if attempts is not None and attempts > 1:
+            logger.warning(
+                "attempts=<%d> | the wrapped model's boto client retries throttled calls itself, "
+                "build it with boto_client_config=NO_RETRIES",
+                attempts,
+            )
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    @property
+    def config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[dict[str, Union[T, Any]], None]:
+        return structured_output(self, output_model, prompt, system_prompt, **kwargs)
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[list[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: ToolChoice | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        max_tokens = self.get_config().get("max_tokens") or self.default_max_tokens
+        reserved = estimate_request_tokens(messages, system_prompt, tool_specs) + max_tokens
+        scope = current_scope()
+        deadline = scope.deadline if scope is not None else None
+
+        for attempt in range(self.max_throttle_retries + 1):
+            await self.limiter.acquire(reserved, deadline)
+            used = reserved
+            started = False
+            try:
+                async for event in self.model.stream(
+                    messages, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs
+                ):
+                    started = True
+                    if "metadata" in event and "usage" in event["metadata"]:
+                        usage = event["metadata"]["usage"]
+                        used = usage.get("inputTokens", 0) + usage.get("outputTokens", 0)
+                    yield event
+            except ModelThrottledException as e:
+                self.limiter.on_throttle()
+                if not started:
+                    used = 0
+                if started:
+                    raise
+                if attempt == self.max_throttle_retries:
+                    raise ThrottleRetriesExhausted(
+                        f"throttled {attempt + 1} times, giving up after max_throttle_retries={attempt}"
+                    ) from e
+                # Nothing streamed yet: queue again behind the reduced rate instead of failing
+                continue
+            finally:
+                self.limiter.settle(reserved, used)
+
+            self.limiter.on_success()
+            return
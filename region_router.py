@@ -0,0 +1,297 @@
+"""
+Multi-Region Routing with Hedged Requests
+
+- RegionRouter is a Model that wraps several models, typically BedrockModels in different regions
+- Each region keeps rolling (EWMA) estimates of time-to-first-token and total latency; every request goes to the
+  fastest healthy region (regions without data yet are tried first)
+- Throttling, connection or server errors before the first token mark a region unhealthy for a cooldown, and the
+  request fails over to the next region right away (other errors, e.g. validation, are raised as usual)
+- Hedging (hedge_after=seconds): if the first token hasn't arrived by then, a second request goes to the next best
+  region; whichever streams first wins and the other is cancelled (its Bedrock response stream is closed)
+- Once a response has started streaming it is never switched
+- stats() shows the estimates, health and hedge outcomes per region
+- Works with any Model, so it can be tested offline, e.g. with ReplayModels (replay_model.py) at different
+  time_scale values, or BedrockModels pointed at local stub endpoints (endpoint_url=...)
+
+Usage:
+    model = RegionRouter(
+        [BedrockModel(region_name="us-east-1"), BedrockModel(region_name="us-west-2")],
+        hedge_after=2.0,
+    )
+    agent = Agent(model=model)
+"""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Optional, Type, TypeVar, Union
+
+from botocore.exceptions import ClientError, HTTPClientError
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.exceptions import ModelThrottledException
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolChoice, ToolSpec
+
+from model_utils import structured_output
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Bedrock response streams opened by the current attempt, so a losing attempt can close them
+_open_streams: ContextVar[Optional[list[Any]]] = ContextVar("region_router_open_streams", default=None)
+
+_END = object()
+
+
+class RegionStats:
+    """Rolling latency estimates and health of one region."""
+
+    def __init__(self, name: str, model: Model, alpha: float):
+        self.name = name
+        self.model = model
+        self.alpha = alpha
+        self.ttft: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.hedges_started = 0
+        self.hedges_won = 0
+        self.unhealthy_until = 0.0
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        return value if current is None else current + self.alpha * (value - current)
+
+    def observe_ttft(self, seconds: float) -> None:
+        self.ttft = self._ewma(self.ttft, seconds)
+
+    def observe_latency(self, seconds: float) -> None:
+        self.latency = self._ewma(self.latency, seconds)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ttft_s": round(self.ttft, 4) if self.ttft is not None else None,
+            "latency_s": round(self.latency, 4) if self.latency is not None else None,
+            "healthy": self.healthy,
+            "requests": self.requests,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "hedges_started": self.hedges_started,
+            "hedges_won": self.hedges_won,
+        }
+
+
+class _Attempt:
+    """One request to one region, drained by its own task so it can be raced and cancelled."""
+
+    def __init__(self, region: RegionStats, events: AsyncIterable[StreamEvent], hedge: bool = False):
+        self.region = region
+        self.hedge = hedge
+        self.started = time.monotonic()
+        self.queue: asyncio.Queue[Any] = asyncio.Queue()
+        self.first: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self.streams: list[Any] = []
+        self.task = asyncio.create_task(self._pump(events))
+
+    async def _pump(self, events: AsyncIterable[StreamEvent]) -> None:
+        _open_streams.set(self.streams)
+        try:
+            async for event in events:
+                if not self.first.done():
+                    self.first.set_result(None)
+                self.queue.put_nowait(event)
+            item: Any = _END
+        except Exception as e:
+            item = e
+        if not self.first.done():
+            self.first.set_result(item)
+        self.queue.put_nowait(item)
+
+    def cancel(self) -> None:
+        for stream in self.streams:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        self.task.cancel()
+
+
+class RegionRouter(Model):
+    """Routes each request to the fastest healthy region, with optional hedging and failover."""
+
+    def __init__(
+        self,
+        models: Union[list[Model], dict[str, Model]],
+        hedge_after: Optional[float] = None,
+        unhealthy_cooldown: float = 30.0,
+        alpha: float = 0.2,
+    ):
+        if not models:
+            raise ValueError("at least one model is required")
+        if isinstance(models, list):
+            named: dict[str, Model] = {}
+            for index, model in enumerate(models):
+                name = _region_name(model, index)
+                named[f"{name}-{index}" if name in named else name] = model
+            models = named
+
+        self.regions = [RegionStats(name, model, alpha) for name, model in models.items()]
+        self.hedge_after = hedge_after
+        self.unhealthy_cooldown = unhealthy_cooldown
+
+        for region in self.regions:
+            _track_bedrock_streams(region.model)
+
+    def update_config(self, **model_config: Any) -> None:
+        for region in self.regions:
+            region.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.regions[0].model.get_config()
+
+    @property
+    def config(self) -> Any:
+        return self.get_config()
+
+    def ranked(self) -> list[RegionStats]:
+        """Healthy regions fastest first (unmeasured ones first of all), then unhealthy ones as a last resort."""
+        healthy = [region for region in self.regions if region.healthy]
+        unhealthy = [region for region in self.regions if not region.healthy]
+        healthy.sort(key=lambda region: region.ttft if region.ttft is not None else -1.0)
+        unhealthy.sort(key=lambda region: region.unhealthy_until)
+        return healthy + unhealthy
+
+    def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[dict[str, Union[T, Any]], None]:
+        return structured_output(self, output_model, prompt, system_prompt, **kwargs)
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[list[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: ToolChoice | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        def request(model: Model) -> AsyncIterable[StreamEvent]:
+            return model.stream(messages, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs)
+
+        attempts: list[_Attempt] = []
+        try:
+            winner = await self._race(request, attempts)
+            while (item := await winner.queue.get()) is not _END:
+                if isinstance(item, BaseException):
+                    winner.region.failures += 1
+                    raise item
+                yield item
+            winner.region.observe_latency(time.monotonic() - winner.started)
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _race(self, request: Callable[[Model], AsyncIterable[StreamEvent]], attempts: list[_Attempt]) -> _Attempt:
+        """Start the request on the best region (plus a hedge if it's slow) and return the first to stream."""
+        candidates = iter(self.ranked())
+        active: list[_Attempt] = []
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        def launch(hedge: bool = False) -> bool:
+            region = next(candidates, None)
+            if region is None:
+                return False
+            region.requests += 1
+            if hedge:
+                region.hedges_started += 1
+            attempt = _Attempt(region, request(region.model), hedge)
+            attempts.append(attempt)
+            active.append(attempt)
+            return True
+
+        launch()
+        while active:
+            timeout = self.hedge_after if not hedged and self.hedge_after is not None else None
+            done, _ = await asyncio.wait([a.first for a in active], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                if launch(hedge=True):
+                    logger.debug("region=<%s> | no first token after %ss, hedging", active[0].region.name, timeout)
+                continue
+
+            for attempt in [a for a in active if a.first in done]:
+                outcome = attempt.first.result()
+                if isinstance(outcome, BaseException):
+                    if not _is_regional_failure(outcome):
+                        # e.g. a validation or context window error - another region won't do better
+                        raise outcome
+                    # Failed before streaming anything: take the region out for a while and fail over
+                    active.remove(attempt)
+                    self._mark_unhealthy(attempt.region, outcome)
+                    last_error = outcome
+                    continue
+
+                attempt.region.observe_ttft(time.monotonic() - attempt.started)
+                if attempt.hedge:
+                    attempt.region.hedges_won += 1
+                for loser in active:
+                    if loser is not attempt:
+                        # Still waiting on its first token, so it took at least this long
+                        loser.region.observe_ttft(time.monotonic() - loser.started)
+                        loser.cancel()
+                return attempt
+
+            if not active and not launch():
+                break
+
+        assert last_error is not None
+        raise last_error
+
+    def _mark_unhealthy(self, region: RegionStats, error: BaseException) -> None:
+        region.failures += 1
+        if isinstance(error, ModelThrottledException):
+            region.throttled += 1
+        region.unhealthy_until = time.monotonic() + self.unhealthy_cooldown
+        logger.warning("region=<%s>, error=<%s> | region unhealthy, failing over", region.name, error)
+
+    def stats(self) -> dict[str, Any]:
+        return {region.name: region.stats() for region in self.regions}
+
+
+def _is_regional_failure(error: BaseException) -> bool:
+    """Throttling, connection problems and server errors - the kind of failure another region may not have."""
+    if isinstance(error, (ModelThrottledException, HTTPClientError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0) >= 500
+    return False
+
+
+def _region_name(model: Model, index: int) -> str:
+    client = getattr(model, "client", None)
+    return client.meta.region_name if client is not None else f"model-{index}"
+
+
+def _track_bedrock_streams(model: Model) -> None:
+    """Remember each Bedrock response stream in the attempt that opened it (boto after-call hook)."""
+    client = getattr(model, "client", None)
+    if client is None:
+        return
+
+    def after_call(parsed: dict[str, Any], **kwargs: Any) -> None:
+        streams = _open_streams.get()
+        if streams is not None and parsed.get("stream") is not None:
+            streams.append(parsed["stream"])
+
+    client.meta.events.register(
+        "after-call.bedrock-runtime.ConverseStream", after_call, unique_id="region-router-after-stream"
+    )
@@ -0,0 +1,172 @@
+"""
+Record / Replay Model Providers
+
+- RecordingModel wraps a real model (e.g. BedrockModel) and saves every streamed response to a cassette file
+- ReplayModel plays a cassette back without any network access, so the agent loop, streaming path, tools and
+  session I/O can be benchmarked and tested offline / in CI
+- Replay timing is configurable with time_scale:
+    - 1.0  - original inter-chunk delays
+    - 0.5  - scaled (here: twice as fast)
+    - 0    - no delays (pure framework overhead)
+- Responses are matched on the request (messages, tool specs, system prompt); if a request doesn't match exactly
+  (e.g. a current_time tool result changed) the next unplayed response is used, unless strict=True
+
+Usage:
+    # Record once against Bedrock
+    agent = Agent(model=RecordingModel(BedrockModel(), "fixtures/agent.json"), tools=[...])
+    agent("What is 3111696 / 74088?")
+
+    # Replay as often as needed
+    agent = Agent(model=ReplayModel("fixtures/agent.json", time_scale=0), tools=[...])
+    agent("What is 3111696 / 74088?")
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, AsyncGenerator, AsyncIterable, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolChoice, ToolSpec
+
+from model_utils import structured_output
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class FixtureNotFound(LookupError):
+    """The cassette has no recorded response for this request."""
+
+
+def request_key(
+    messages: Messages,
+    tool_specs: Optional[list[ToolSpec]],
+    system_prompt: Optional[str],
+    tool_choice: Optional[ToolChoice] = None,
+) -> str:
+    """Stable hash of everything that determines a model response."""
+    material = json.dumps(
+        {"messages": messages, "tool_specs": tool_specs, "system_prompt": system_prompt, "tool_choice": tool_choice},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class RecordingModel(Model):
+    """Passes requests through to a real model and records the streamed responses."""
+
+    def __init__(self, model: Model, cassette_path: str):
+        self.model = model
+        self.cassette_path = cassette_path
+        self.interactions: list[dict[str, Any]] = []
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    @property
+    def config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[dict[str, Union[T, Any]], None]:
+        return structured_output(self, output_model, prompt, system_prompt, **kwargs)
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[list[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: ToolChoice | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        key = request_key(messages, tool_specs, system_prompt, tool_choice)
+        start = time.monotonic()
+        events = []
+
+        async for event in self.model.stream(
+            messages, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs
+        ):
+            events.append([time.monotonic() - start, event])
+            yield event
+
+        self.interactions.append({"key": key, "events": events})
+        self.save()
+
+    def save(self) -> None:
+        """Write the cassette atomically."""
+        os.makedirs(os.path.dirname(self.cassette_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cassette_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"interactions": self.interactions}, f)
+        os.replace(tmp_path, self.cassette_path)
+
+
+class ReplayModel(Model):
+    """Streams recorded responses from a cassette, with original, scaled or no timing."""
+
+    def __init__(self, cassette_path: str, time_scale: float = 1.0, strict: bool = False, **model_config: Any):
+        with open(cassette_path, encoding="utf-8") as f:
+            self.interactions: list[dict[str, Any]] = json.load(f)["interactions"]
+        self.time_scale = time_scale
+        self.strict = strict
+        self.config: dict[str, Any] = {"model_id": "replay", **model_config}
+        self._played = [False] * len(self.interactions)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Any:
+        return self.config
+
+    def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[dict[str, Union[T, Any]], None]:
+        return structured_output(self, output_model, prompt, system_prompt, **kwargs)
+
+    def reset(self) -> None:
+        """Make every recorded response available again (e.g. between benchmark iterations)."""
+        self._played = [False] * len(self.interactions)
+
+    def _find(self, key: str) -> dict[str, Any]:
+        for index, interaction in enumerate(self.interactions):
+            if not self._played[index] and interaction["key"] == key:
+                self._played[index] = True
+                return interaction
+
+        if not self.strict:
+            for index, interaction in enumerate(self.interactions):
+                if not self._played[index]:
+                    self._played[index] = True
+                    return interaction
+
+        raise FixtureNotFound(f"No recorded response for request {key[:12]} (strict={self.strict})")
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[list[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: ToolChoice | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        interaction = self._find(request_key(messages, tool_specs, system_prompt, tool_choice))
+        start = time.monotonic()
+
+        for offset, event in interaction["events"]:
+            if self.time_scale > 0:
+                delay = offset * self.time_scale - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield event
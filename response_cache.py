@@ -0,0 +1,224 @@
+"""
+Response Cache
+
+- Exact-match cache in front of the agent: key = normalized prompt + tool names + model config
+- Stores the coalesced event batches of a response (see stream_framing.py), with each batch's offset from the start
+- A hit replays the recorded batches through the same encoder, so the client sees the same events with the same
+  chunking (optionally with the original timing) without a model round trip
+- Responses are only stored when the stream completed cleanly and no uncacheable tool was used - tools with side
+  effects or time-dependent output (current_time, http_request, ...) make the response bypass the cache
+- LRU + TTL eviction, with pluggable backends:
+    - MemoryCacheBackend - in-process
+    - DiskCacheBackend   - one JSON file per entry in a local directory, survives restarts
+
+Usage:
+    cache = ResponseCache(MemoryCacheBackend(max_entries=1024, ttl=3600))
+
+    key = cache.key(prompt, agent.tool_names, agent.model.get_config())
+    entry = cache.get(key)
+    if entry:
+        batches = cache.replay(entry)
+    else:
+        batches = cache.record(key, coalesce(to_stream_events(agent.stream_async(prompt))))
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterable, Optional
+
+# Tools whose output depends on the outside world or the clock, or that change it
+DEFAULT_UNCACHEABLE_TOOLS = frozenset(
+    {
+        "current_time",
+        "http_request",
+        "shell",
+        "python_repl",
+        "use_aws",
+        "file_write",
+        "editor",
+        "retrieve",
+        "memory",
+    }
+)
+
+
+class CacheBackend(ABC):
+    """Storage for cached responses. Entries are JSON-serializable lists of [offset_seconds, batch] pairs."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[list]:
+        """Return the entry for key, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, entry: list) -> None:
+        """Store an entry, evicting the least recently used ones if over capacity."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU + TTL cache."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, list]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[list]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires, entry = item
+        if expires < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: list) -> None:
+        expires = time.time() + self.ttl if self.ttl is not None else float("inf")
+        self._entries[key] = (expires, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheBackend(CacheBackend):
+    """LRU + TTL cache stored as one JSON file per entry; recency is tracked with file mtimes."""
+
+    def __init__(self, directory: str, max_entries: int = 10_000, ttl: Optional[float] = 24 * 3600):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+        # Rebuild recency order from what's on disk
+        files = [name for name in os.listdir(directory) if name.endswith(".json")]
+        files.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+        self._order: OrderedDict[str, None] = OrderedDict((name[:-5], None) for name in files)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[list]:
+        if key not in self._order:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self._order.pop(key, None)
+            return None
+
+        if data["expires"] is not None and data["expires"] < time.time():
+            self._remove(key)
+            return None
+
+        os.utime(path)
+        self._order.move_to_end(key)
+        return data["entry"]
+
+    def set(self, key: str, entry: list) -> None:
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"expires": expires, "entry": entry}, f)
+        os.replace(tmp_path, path)
+
+        self._order[key] = None
+        self._order.move_to_end(key)
+        while len(self._order) > self.max_entries:
+            oldest = next(iter(self._order))
+            self._remove(oldest)
+
+    def _remove(self, key: str) -> None:
+        self._order.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class ResponseCache:
+    """Records agent event streams and replays them for repeated requests."""
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        uncacheable_tools: Iterable[str] = DEFAULT_UNCACHEABLE_TOOLS,
+    ):
+        self.backend = backend or MemoryCacheBackend()
+        self.uncacheable_tools = frozenset(uncacheable_tools)
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0}
+
+    @staticmethod
+    def key(prompt: str, tool_names: Iterable[str], model_config: dict[str, Any]) -> str:
+        """Cache key for a prompt run with a given tool set and model configuration."""
+        normalized_prompt = re.sub(r"\s+", " ", prompt).strip()
+        material = json.dumps(
+            {"prompt": normalized_prompt, "tools": sorted(tool_names), "model": model_config},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[list]:
+        entry = self.backend.get(key)
+        self._stats["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    async def record(
+        self, key: str, batches: AsyncIterator[list[dict[str, Any]]]
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Pass event batches through, storing them if the response turns out to be cacheable."""
+        start = time.monotonic()
+        recorded: list = []
+        cacheable = True
+        completed = False
+
+        async for batch in batches:
+            for event in batch:
+                if event["type"] == "error" or (
+                    event["type"] == "tool_use" and event["name"] in self.uncacheable_tools
+                ):
+                    cacheable = False
+                completed = completed or event["type"] == "complete"
+            if cacheable:
+                recorded.append([time.monotonic() - start, batch])
+            yield batch
+
+        # Only reached if the stream ran to completion
+        if cacheable and completed:
+            self.backend.set(key, recorded)
+            self._stats["stores"] += 1
+        else:
+            self._stats["bypassed"] += 1
+
+    async def replay(self, entry: list, realtime: bool = False) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield recorded batches, optionally spaced out as they were originally produced."""
+        start = time.monotonic()
+        for offset, batch in entry:
+            if realtime:
+                delay = offset - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield batch
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, "entries": len(self.backend)}
@@ -0,0 +1,26 @@
+"""
+Structured Output Schemas
+
+- Pydantic models used as output_model in the examples, in an importable module (strands-providers.py can't be
+  imported because of the hyphen in its name)
+- ProductAnalysis is the schema used in strands-providers.py; structured_batch.py can extract it from a JSONL file
+
+Usage:
+    from schemas import ProductAnalysis
+    result = agent.structured_output(ProductAnalysis, "Analyze this product: ...")
+
+    python structured_batch.py products.jsonl analyses.jsonl --schema schemas:ProductAnalysis
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProductAnalysis(BaseModel):
+    """Analyze product information from text."""
+    name: str = Field(description="Product name")
+    category: str = Field(description="Product category")
+    price: float = Field(description="Price in USD")
+    features: List[str] = Field(description="Key product features")
+    rating: Optional[float] = Field(description="Customer rating 1-5", ge=1, le=5)
@@ -0,0 +1,555 @@
+"""
+Append-only Session Log
+
+- FileSessionManager writes every message to its own messages/message_<id>.json and rewrites agent.json on every
+  update: long sessions become thousands of small files (inodes), and restoring one means thousands of opens
+- LogSessionRepository keeps each agent's messages and agent record in one append-only log, split into segments of
+  segment_bytes; updates are appended too, and the latest record for an id wins
+- An in-memory offset index (message id -> segment, offset, length) makes reads a single pread; a sealed segment gets
+  a small .idx hint file with its offsets, so opening a log only scans the active segment
+- Restoring a session (list_messages) reads each segment's range of messages with one sequential read
+- Writes are fsynced in batches: a background thread fsyncs dirty logs every fsync_interval seconds (0 fsyncs every
+  write, None leaves it to the OS)
+- Compaction: once superseded records (mostly agent updates, which happen on every message) exceed compact_ratio of
+  the log, the live records are copied to a new segment and the old ones deleted; the copy is written to a
+  temporary file and renamed, and newer segments win on load, so a crash at any point leaves a valid log
+- Crash recovery: every record carries its length and a CRC32; a torn write at the end of the active segment is
+  detected and truncated on open
+- Logs are shared within the process: every repository opening the same agent directory uses the same _AgentLog
+  (one writer and one index), which is closed when the last repository using it is closed or garbage collected
+- One process should write a session at a time (as with the file layout)
+
+Layout:
+    /<storage_dir>/
+    └── session_<session_id>/
+        ├── session.json
+        └── agent_<agent_id>/
+            ├── segment_00000001.log
+            ├── segment_00000001.idx
+            └── segment_00000002.log    # active
+
+Usage:
+    session_manager = LogSessionManager(session_id="user-123", storage_dir="/var/lib/sessions")
+    agent = Agent(session_manager=session_manager)
+"""
+
+import atexit
+import heapq
+import json
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from typing import Any, Optional
+
+from strands import _identifier
+from strands.session.repository_session_manager import RepositorySessionManager
+from strands.session.session_repository import SessionRepository
+from strands.types.exceptions import SessionException
+from strands.types.session import Session, SessionAgent, SessionMessage
+
+from session_utils import session_message
+
+logger = logging.getLogger(__name__)
+
+SESSION_PREFIX = "session_"
+AGENT_PREFIX = "agent_"
+SEGMENT_PREFIX = "segment_"
+
+# Record header: payload length, CRC32 (of kind, message id and payload), kind, message id (-1 for the agent record);
+# followed by the JSON payload. The id is in the header so the index can be built without parsing payloads.
+_HEADER = struct.Struct("<IIBq")
+_KEY = struct.Struct("<Bq")
+_AGENT = 0
+_MESSAGE = 1
+
+# (kind, message id, payload offset, payload length)
+Record = tuple[int, int, int, int]
+
+
+def _frame(kind: int, message_id: int, payload: bytes) -> bytes:
+    crc = zlib.crc32(payload, zlib.crc32(_KEY.pack(kind, message_id)))
+    return _HEADER.pack(len(payload), crc, kind, message_id) + payload
+
+
+def _scan(data: bytes) -> tuple[list[Record], int]:
+    """Records of a segment, and the end of the last valid one (anything after it is a torn write)."""
+    records = []
+    position = 0
+    while position + _HEADER.size <= len(data):
+        length, crc, kind, message_id = _HEADER.unpack_from(data, position)
+        start = position + _HEADER.size
+        end = start + length
+        if end > len(data) or zlib.crc32(data[start:end], zlib.crc32(_KEY.pack(kind, message_id))) != crc:
+            break
+        records.append((kind, message_id, start, length))
+        position = end
+    return records, position
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    directory = os.open(os.path.dirname(path), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+class _Flusher:
+    """One background thread that fsyncs dirty logs once their fsync_interval has passed."""
+
+    def __init__(self) -> None:
+        self._due: list[tuple[float, int, "_AgentLog"]] = []
+        self._condition = threading.Condition()
+        self._seq = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, log: "_AgentLog", interval: float) -> None:
+        with self._condition:
+            self._seq += 1
+            heapq.heappush(self._due, (time.monotonic() + interval, self._seq, log))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="session-log-fsync", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._due or self._due[0][0] > time.monotonic():
+                    self._condition.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                _, _, log = heapq.heappop(self._due)
+            log.sync()
+
+    def flush_all(self) -> None:
+        with self._condition:
+            due, self._due = self._due, []
+        for _, _, log in due:
+            log.sync()
+
+
+_flusher = _Flusher()
+atexit.register(_flusher.flush_all)
+
+
+class _AgentLog:
+    """The segmented log of one agent, with its offset index."""
+
+    def __init__(self, path: str, segment_bytes: int, fsync_interval: Optional[float], compact_ratio: float):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self.lock = threading.RLock()
+
+        # message id -> (segment, payload offset, payload length); the agent record likewise
+        self.messages: dict[int, tuple[int, int, int]] = {}
+        self.agent: Optional[tuple[int, int, int]] = None
+        self.total_bytes = 0
+        self.dead_bytes = 0
+        self.segments: list[int] = []
+        self._readers: dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._active_size = 0
+        self._active_records: list[Record] = []
+        self._dirty = False
+        self._load()
+
+    def _segment_path(self, segment: int, suffix: str = ".log") -> str:
+        return os.path.join(self.path, f"{SEGMENT_PREFIX}{segment:08d}{suffix}")
+
+    def _load(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        for name in os.listdir(self.path):
+            if name.endswith(".tmp"):
+                # Left over from an interrupted compaction or hint write
+                os.remove(os.path.join(self.path, name))
+            elif name.startswith(SEGMENT_PREFIX) and name.endswith(".log"):
+                self.segments.append(int(name[len(SEGMENT_PREFIX) : -4]))
+        self.segments.sort()
+
+        for position, segment in enumerate(self.segments):
+            active = position == len(self.segments) - 1
+            hint_path = self._segment_path(segment, ".idx")
+            if not active and os.path.exists(hint_path):
+                with open(hint_path, "rb") as f:
+                    hint = json.loads(f.read())
+                records = [(kind, message_id, offset, length) for kind, message_id, offset, length in hint["records"]]
+                size = hint["size"]
+            else:
+                with open(self._segment_path(segment), "rb") as f:
+                    data = f.read()
+                records, size = _scan(data)
+                if size < len(data):
+                    logger.warning(
+                        "segment=<%s>, valid_bytes=<%s>, file_bytes=<%s> | truncating torn write",
+                        self._segment_path(segment),
+                        size,
+                        len(data),
+                    )
+                    with open(self._segment_path(segment), "r+b") as f:
+                        f.truncate(size)
+                        os.fsync(f.fileno())
+                if not active:
+                    self._write_hint(segment, records, size)
+            for kind, message_id, offset, length in records:
+                self._index(segment, kind, message_id, offset, length)
+            self.total_bytes += size
+            if active:
+                self._active_size = size
+                self._active_records = records
+
+        if not self.segments:
+            self.segments.append(1)
+        self._writer = os.open(self._segment_path(self.segments[-1]), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _index(self, segment: int, kind: int, message_id: int, offset: int, length: int) -> None:
+        entry = (segment, offset, length)
+        previous = self.agent if kind == _AGENT else self.messages.get(message_id)
+        if previous is not None:
+            self.dead_bytes += _HEADER.size + previous[2]
+        if kind == _AGENT:
+            self.agent = entry
+        else:
+            self.messages[message_id] = entry
+
+    def _write_hint(self, segment: int, records: list[Record], size: int) -> None:
+        _write_atomic(self._segment_path(segment, ".idx"), json.dumps({"size": size, "records": records}).encode())
+
+    def _pread(self, segment: int, offset: int, length: int) -> bytes:
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+        return os.pread(reader, length, offset)
+
+    def append(self, kind: int, data: dict[str, Any], message_id: int = -1) -> None:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        record = _frame(kind, message_id, payload)
+        with self.lock:
+            if self._active_size and self._active_size + len(record) > self.segment_bytes:
+                self._rotate()
+            assert self._writer is not None
+            os.write(self._writer, record)
+            offset = self._active_size + _HEADER.size
+            self._active_size += len(record)
+            self.total_bytes += len(record)
+            self._active_records.append((kind, message_id, offset, len(payload)))
+            self._index(self.segments[-1], kind, message_id, offset, len(payload))
+            self._after_write()
+            if self.dead_bytes > self.segment_bytes and self.dead_bytes > self.compact_ratio * self.total_bytes:
+                self.compact()
+
+    def _after_write(self) -> None:
+        if self.fsync_interval is None:
+            return
+        if self.fsync_interval == 0:
+            assert self._writer is not None
+            os.fsync(self._writer)
+        elif not self._dirty:
+            self._dirty = True
+            _flusher.schedule(self, self.fsync_interval)
+
+    def sync(self) -> None:
+        with self.lock:
+            if self._writer is not None:
+                os.fsync(self._writer)
+            self._dirty = False
+
+    def _rotate(self) -> None:
+        """Seal the active segment (with its hint file) and start a new one."""
+        assert self._writer is not None
+        os.fsync(self._writer)
+        os.close(self._writer)
+        sealed = self.segments[-1]
+        self._write_hint(sealed, self._active_records, self._active_size)
+        self.segments.append(sealed + 1)
+        self._writer = os.open(self._segment_path(sealed + 1), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._active_size = 0
+        self._active_records = []
+
+    def read(self, entry: tuple[int, int, int]) -> dict[str, Any]:
+        with self.lock:
+            return json.loads(self._pread(*entry))  # type: ignore[no-any-return]
+
+    def read_many(self, entries: list[tuple[int, int, int]]) -> list[dict[str, Any]]:
+        return [json.loads(payload) for payload in self._payloads(entries)]
+
+    def _payloads(self, entries: list[tuple[int, int, int]]) -> list[bytes]:
+        """Payloads of entries, with one read per segment (covering all of that segment's entries)."""
+        with self.lock:
+            ranges: dict[int, tuple[int, int]] = {}
+            for segment, offset, length in entries:
+                start, end = ranges.get(segment, (offset, offset + length))
+                ranges[segment] = (min(start, offset), max(end, offset + length))
+            chunks = {
+                segment: (start, self._pread(segment, start, end - start)) for segment, (start, end) in ranges.items()
+            }
+        return [
+            chunks[segment][1][offset - chunks[segment][0] : offset - chunks[segment][0] + length]
+            for segment, offset, length in entries
+        ]
+
+    def compact(self) -> None:
+        """Copy the live records into a new segment and delete the old ones."""
+        with self.lock:
+            keys = [(_AGENT, -1)] if self.agent is not None else []
+            keys += [(_MESSAGE, message_id) for message_id in sorted(self.messages)]
+            entries = [self.agent if kind == _AGENT else self.messages[message_id] for kind, message_id in keys]
+            payloads = self._payloads(entries)  # type: ignore[arg-type]
+
+            compacted = self.segments[-1] + 1
+            data = bytearray()
+            records: list[Record] = []
+            for (kind, message_id), payload in zip(keys, payloads):
+                records.append((kind, message_id, len(data) + _HEADER.size, len(payload)))
+                data += _frame(kind, message_id, payload)
+            # Renamed into place only when complete; until the old segments are deleted, both load to the same state
+            _write_atomic(self._segment_path(compacted), bytes(data))
+            self._write_hint(compacted, records, len(data))
+
+            assert self._writer is not None
+            os.close(self._writer)
+            for reader in self._readers.values():
+                os.close(reader)
+            self._readers = {}
+            for segment in self.segments:
+                for suffix in (".log", ".idx"):
+                    if os.path.exists(self._segment_path(segment, suffix)):
+                        os.remove(self._segment_path(segment, suffix))
+
+            before = self.total_bytes
+            self.segments = [compacted, compacted + 1]
+            self.messages = {}
+            self.agent = None
+            self.dead_bytes = 0
+            for kind, message_id, offset, length in records:
+                self._index(compacted, kind, message_id, offset, length)
+            self.total_bytes = len(data)
+            self._writer = os.open(self._segment_path(compacted + 1), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._active_size = 0
+            self._active_records = []
+            self._dirty = False
+        logger.debug("path=<%s>, bytes_before=<%s>, bytes_after=<%s> | compacted log", self.path, before, len(data))
+
+    @property
+    def closed(self) -> bool:
+        return self._writer is None
+
+    def close(self) -> None:
+        with self.lock:
+            if self._writer is not None:
+                os.fsync(self._writer)
+                os.close(self._writer)
+                self._writer = None
+            for reader in self._readers.values():
+                os.close(reader)
+            self._readers = {}
+
+
+# Open logs of the process: real path -> [log, number of repositories using it]. Two _AgentLogs appending to one
+# directory would each track the segment size on their own and index records at the wrong offsets.
+_open_logs: dict[str, list[Any]] = {}
+_open_logs_lock = threading.Lock()
+
+
+def _acquire_log(path: str, segment_bytes: int, fsync_interval: Optional[float], compact_ratio: float) -> _AgentLog:
+    """The process's log for path, opening it on first use; the settings of the first opener apply."""
+    key = os.path.realpath(path)
+    with _open_logs_lock:
+        entry = _open_logs.get(key)
+        if entry is None:
+            entry = _open_logs[key] = [_AgentLog(key, segment_bytes, fsync_interval, compact_ratio), 0]
+        entry[1] += 1
+        return entry[0]  # type: ignore[no-any-return]
+
+
+def _release_logs(logs: list[_AgentLog]) -> None:
+    """Drop one reference to each log, closing those no repository uses anymore."""
+    with _open_logs_lock:
+        for log in logs:
+            entry = _open_logs.get(log.path)
+            if entry is None or entry[0] is not log:
+                continue
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _open_logs[log.path]
+                log.close()
+
+
+def _discard_logs(directory: str) -> None:
+    """Close every open log under directory (before it is deleted), whichever repositories use it."""
+    prefix = os.path.realpath(directory) + os.sep
+    with _open_logs_lock:
+        for key in [key for key in _open_logs if key.startswith(prefix)]:
+            _open_logs.pop(key)[0].close()
+
+
+class LogSessionRepository(SessionRepository):
+    """SessionRepository storing each agent as an append-only segmented log."""
+
+    def __init__(
+        self,
+        storage_dir: Optional[str] = None,
+        segment_bytes: int = 8 * 1024 * 1024,
+        fsync_interval: Optional[float] = 0.2,
+        compact_ratio: float = 0.5,
+    ):
+        self.storage_dir = storage_dir or os.path.join(tempfile.gettempdir(), "strands/session_logs")
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self._logs: dict[tuple[str, str], _AgentLog] = {}
+        self._lock = threading.Lock()
+        # Releases this repository's logs if it is dropped without close(), e.g. with a LogSessionManager
+        self._finalizer = weakref.finalize(self, self._release, self._logs, self._lock)
+
+    @staticmethod
+    def _release(logs: dict[tuple[str, str], _AgentLog], lock: threading.Lock) -> None:
+        with lock:
+            released = list(logs.values())
+            logs.clear()
+        _release_logs(released)
+
+    def _session_path(self, session_id: str) -> str:
+        session_id = _identifier.validate(session_id, _identifier.Identifier.SESSION)
+        return os.path.join(self.storage_dir, f"{SESSION_PREFIX}{session_id}")
+
+    def _log(self, session_id: str, agent_id: str, create: bool = False) -> Optional[_AgentLog]:
+        key = (session_id, agent_id)
+        with self._lock:
+            log = self._logs.get(key)
+            if log is not None and log.closed:
+                # The session was deleted through another repository
+                del self._logs[key]
+                log = None
+            if log is None:
+                agent_id = _identifier.validate(agent_id, _identifier.Identifier.AGENT)
+                path = os.path.join(self._session_path(session_id), f"{AGENT_PREFIX}{agent_id}")
+                if not create and not os.path.isdir(path):
+                    return None
+                log = self._logs[key] = _acquire_log(path, self.segment_bytes, self.fsync_interval, self.compact_ratio)
+            return log
+
+    def create_session(self, session: Session, **kwargs: Any) -> Session:
+        session_dir = self._session_path(session.session_id)
+        if os.path.exists(session_dir):
+            raise SessionException(f"Session {session.session_id} already exists")
+        os.makedirs(session_dir)
+        _write_atomic(os.path.join(session_dir, "session.json"), json.dumps(session.to_dict()).encode())
+        return session
+
+    def read_session(self, session_id: str, **kwargs: Any) -> Optional[Session]:
+        session_file = os.path.join(self._session_path(session_id), "session.json")
+        if not os.path.exists(session_file):
+            return None
+        with open(session_file, "rb") as f:
+            return Session.from_dict(json.loads(f.read()))
+
+    def delete_session(self, session_id: str, **kwargs: Any) -> None:
+        session_dir = self._session_path(session_id)
+        if not os.path.exists(session_dir):
+            raise SessionException(f"Session {session_id} does not exist")
+        with self._lock:
+            for key in [key for key in self._logs if key[0] == session_id]:
+                del self._logs[key]
+        _discard_logs(session_dir)
+        shutil.rmtree(session_dir)
+
+    def create_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        log = self._log(session_id, session_agent.agent_id, create=True)
+        assert log is not None
+        log.append(_AGENT, session_agent.to_dict())
+
+    def read_agent(self, session_id: str, agent_id: str, **kwargs: Any) -> Optional[SessionAgent]:
+        log = self._log(session_id, agent_id)
+        if log is None or log.agent is None:
+            return None
+        return SessionAgent.from_dict(log.read(log.agent))
+
+    def update_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        agent_id = session_agent.agent_id
+        previous_agent = self.read_agent(session_id=session_id, agent_id=agent_id)
+        if previous_agent is None:
+            raise SessionException(f"Agent {agent_id} in session {session_id} does not exist")
+        session_agent.created_at = previous_agent.created_at
+        log = self._log(session_id, agent_id)
+        assert log is not None
+        log.append(_AGENT, session_agent.to_dict())
+
+    def create_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        log = self._log(session_id, agent_id)
+        if log is None:
+            raise SessionException(f"Agent {agent_id} in session {session_id} does not exist")
+        log.append(_MESSAGE, session_message.to_dict(), session_message.message_id)
+
+    def read_message(self, session_id: str, agent_id: str, message_id: int, **kwargs: Any) -> Optional[SessionMessage]:
+        log = self._log(session_id, agent_id)
+        entry = log.messages.get(message_id) if log is not None else None
+        if log is None or entry is None:
+            return None
+        return session_message(log.read(entry))
+
+    def update_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        message_id = session_message.message_id
+        previous_message = self.read_message(session_id=session_id, agent_id=agent_id, message_id=message_id)
+        if previous_message is None:
+            raise SessionException(f"Message {message_id} does not exist")
+        session_message.created_at = previous_message.created_at
+        log = self._log(session_id, agent_id)
+        assert log is not None
+        log.append(_MESSAGE, session_message.to_dict(), message_id)
+
+    def list_messages(
+        self, session_id: str, agent_id: str, limit: Optional[int] = None, offset: int = 0, **kwargs: Any
+    ) -> list[SessionMessage]:
+        log = self._log(session_id, agent_id)
+        if log is None:
+            raise SessionException(f"Agent {agent_id} in session {session_id} does not exist")
+        with log.lock:
+            ids = sorted(log.messages)
+            ids = ids[offset : offset + limit] if limit is not None else ids[offset:]
+            entries = [log.messages[message_id] for message_id in ids]
+        return [session_message(data) for data in log.read_many(entries)]
+
+    def compact(self) -> None:
+        """Compact every open log now."""
+        with self._lock:
+            logs = list(self._logs.values())
+        for log in logs:
+            log.compact()
+
+    def close(self) -> None:
+        """Release this repository's logs; a log is closed once no repository in the process uses it."""
+        self._finalizer()
+
+
+class LogSessionManager(RepositorySessionManager):
+    """Session manager backed by a LogSessionRepository, a drop-in replacement for FileSessionManager."""
+
+    def __init__(
+        self,
+        session_id: str,
+        storage_dir: Optional[str] = None,
+        repository: Optional[LogSessionRepository] = None,
+        **kwargs: Any,
+    ):
+        self._owns_repository = repository is None
+        self.repository = repository or LogSessionRepository(storage_dir)
+        super().__init__(session_id=session_id, session_repository=self.repository)
+
+    def close(self) -> None:
+        """Release the logs of a repository this manager created (a shared repository is left open)."""
+        if self._owns_repository:
+            self.repository.close()
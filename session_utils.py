@@ -0,0 +1,22 @@
+"""
+Session Utilities
+
+- Helpers shared by the session repositories in this project (session_log, sqlite_session)
+- session_message() builds a SessionMessage from its stored dict; SessionMessage.from_dict inspects the class
+  signature for every key, which dominates restoring long sessions
+
+Usage:
+    messages = [session_message(json.loads(row)) for row in rows]
+"""
+
+from dataclasses import fields
+from typing import Any
+
+from strands.types.session import SessionMessage, decode_bytes_values
+
+_MESSAGE_FIELDS = frozenset(field.name for field in fields(SessionMessage))
+
+
+def session_message(data: dict[str, Any]) -> SessionMessage:
+    """SessionMessage from its to_dict() form, like SessionMessage.from_dict."""
+    return SessionMessage(**decode_bytes_values({k: v for k, v in data.items() if k in _MESSAGE_FIELDS}))
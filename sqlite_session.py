@@ -0,0 +1,343 @@
+"""
+SQLite Session Repository
+
+- A SessionRepository on one SQLite database in WAL mode, for RepositorySessionManager: many FastAPI workers on one
+  host can share a session store (concurrent readers, one writer at a time, busy_timeout instead of errors)
+- One connection per thread, reused across calls and session managers, and closed when the thread ends (Agent runs
+  every call on a new thread, so connections are not kept for dead threads); the SQL is constant, so every statement
+  is prepared once per connection and reused from sqlite3's statement cache
+- create_message is batched: messages are queued and written with one executemany, in the transaction of the next
+  update_agent (RepositorySessionManager syncs the agent after every message, so a message and the agent state commit
+  together, one transaction instead of two), when batch_size messages are pending, after flush_interval seconds, or
+  before anything reads or updates messages
+- Messages are keyed (session_id, agent_id, message_id) - the primary key is the covering index, so listing an
+  agent's messages is a range scan
+- list_messages supports keyset pagination (after_message_id=...) besides limit / offset; iter_messages pages through
+  a whole conversation that way
+
+Usage:
+    repository = shared_repository("/var/lib/sessions/sessions.db")    # once per process
+    session_manager = RepositorySessionManager(session_id="user-123", session_repository=repository)
+    agent = Agent(session_manager=session_manager)
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Iterator, Optional
+
+from strands.session.session_repository import SessionRepository
+from strands.types.exceptions import SessionException
+from strands.types.session import Session, SessionAgent, SessionMessage
+
+from session_utils import session_message
+
+logger = logging.getLogger(__name__)
+
+# Every repository, so queued messages are written at exit
+_open_repositories: "weakref.WeakSet[SQLiteSessionRepository]" = weakref.WeakSet()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agents (
+    session_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, agent_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, agent_id, message_id)
+) WITHOUT ROWID;
+"""
+
+_INSERT_MESSAGE = (
+    "INSERT OR REPLACE INTO messages (session_id, agent_id, message_id, created_at, data) VALUES (?, ?, ?, ?, ?)"
+)
+_SELECT_MESSAGES = (
+    "SELECT data FROM messages WHERE session_id = ? AND agent_id = ? AND message_id > ? ORDER BY message_id"
+)
+
+
+def _dumps(data: dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class _ThreadConnection:
+    """A thread's connection; only the thread-local refers to it, so it is closed when the thread ends."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.finalizer = weakref.finalize(self, connection.close)
+
+
+class SQLiteSessionRepository(SessionRepository):
+    """SessionRepository on a SQLite database in WAL mode, with per-thread connections and batched message inserts."""
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+        busy_timeout: float = 5.0,
+        synchronous: str = "NORMAL",
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+
+        self._local = threading.local()
+        self._connections: "weakref.WeakSet[_ThreadConnection]" = weakref.WeakSet()
+
+        self._pending: list[tuple[str, str, int, str, str]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        _open_repositories.add(self)
+
+    def _connection(self) -> sqlite3.Connection:
+        holder: Optional[_ThreadConnection] = getattr(self._local, "holder", None)
+        if holder is None:
+            # Autocommit mode; transactions are explicit (BEGIN IMMEDIATE) so writers never deadlock upgrading locks.
+            # Only this thread uses the connection; check_same_thread is off so it can be closed from any thread.
+            connection = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute(f"PRAGMA synchronous = {self.synchronous}")
+            holder = self._local.holder = _ThreadConnection(connection)
+            self._connections.add(holder)
+        return holder.connection
+
+    def _write(self, sql: str, parameters: Any, many: bool = False) -> int:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = connection.executemany(sql, parameters) if many else connection.execute(sql, parameters)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    # Batched message inserts
+
+    def _take_pending(self) -> list[tuple[str, str, int, str, str]]:
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _requeue(self, pending: list[tuple[str, str, int, str, str]]) -> None:
+        with self._pending_lock:
+            self._pending[:0] = pending
+
+    def flush(self) -> None:
+        """Write all queued messages in one transaction."""
+        pending = self._take_pending()
+        if pending:
+            try:
+                self._write(_INSERT_MESSAGE, pending, many=True)
+            except BaseException:
+                self._requeue(pending)
+                raise
+            logger.debug("messages=<%s> | flushed message batch", len(pending))
+
+    def _run_flusher(self) -> None:
+        while not self._closed:
+            self._flush_requested.wait()
+            self._flush_requested.clear()
+            # Let the batch fill up for flush_interval
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("error flushing message batch")
+
+    def create_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        message = session_message.to_dict()
+        row = (session_id, agent_id, session_message.message_id, session_message.created_at, _dumps(message))
+        with self._pending_lock:
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+            if self._flusher is None and not full:
+                self._flusher = threading.Thread(target=self._run_flusher, name="sqlite-session-flush", daemon=True)
+                self._flusher.start()
+        if full or self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._flush_requested.set()
+
+    # Sessions and agents
+
+    def create_session(self, session: Session, **kwargs: Any) -> Session:
+        try:
+            self._write(
+                "INSERT INTO sessions (session_id, data) VALUES (?, ?)", (session.session_id, _dumps(session.to_dict()))
+            )
+        except sqlite3.IntegrityError as e:
+            raise SessionException(f"Session {session.session_id} already exists") from e
+        return session
+
+    def read_session(self, session_id: str, **kwargs: Any) -> Optional[Session]:
+        row = self._connection().execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return Session.from_dict(json.loads(row[0])) if row else None
+
+    def delete_session(self, session_id: str, **kwargs: Any) -> None:
+        self.flush()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            connection.execute("DELETE FROM agents WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        if not deleted:
+            raise SessionException(f"Session {session_id} does not exist")
+
+    def create_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO agents (session_id, agent_id, created_at, data) VALUES (?, ?, ?, ?)",
+            (session_id, session_agent.agent_id, session_agent.created_at, _dumps(session_agent.to_dict())),
+        )
+
+    def read_agent(self, session_id: str, agent_id: str, **kwargs: Any) -> Optional[SessionAgent]:
+        row = self._connection().execute(
+            "SELECT data FROM agents WHERE session_id = ? AND agent_id = ?", (session_id, agent_id)
+        ).fetchone()
+        return SessionAgent.from_dict(json.loads(row[0])) if row else None
+
+    def update_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        agent_id = session_agent.agent_id
+        pending = self._take_pending()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if pending:
+                connection.executemany(_INSERT_MESSAGE, pending)
+            row = connection.execute(
+                "SELECT created_at FROM agents WHERE session_id = ? AND agent_id = ?", (session_id, agent_id)
+            ).fetchone()
+            if row is None:
+                raise SessionException(f"Agent {agent_id} in session {session_id} does not exist")
+            session_agent.created_at = row[0]
+            connection.execute(
+                "UPDATE agents SET data = ? WHERE session_id = ? AND agent_id = ?",
+                (_dumps(session_agent.to_dict()), session_id, agent_id),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            self._requeue(pending)
+            raise
+
+    # Messages
+
+    def read_message(self, session_id: str, agent_id: str, message_id: int, **kwargs: Any) -> Optional[SessionMessage]:
+        self.flush()
+        row = self._connection().execute(
+            "SELECT data FROM messages WHERE session_id = ? AND agent_id = ? AND message_id = ?",
+            (session_id, agent_id, message_id),
+        ).fetchone()
+        return session_message(json.loads(row[0])) if row else None
+
+    def update_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        self.flush()
+        message_id = session_message.message_id
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT created_at FROM messages WHERE session_id = ? AND agent_id = ? AND message_id = ?",
+                (session_id, agent_id, message_id),
+            ).fetchone()
+            if row is None:
+                raise SessionException(f"Message {message_id} does not exist")
+            session_message.created_at = row[0]
+            connection.execute(
+                "UPDATE messages SET data = ? WHERE session_id = ? AND agent_id = ? AND message_id = ?",
+                (_dumps(session_message.to_dict()), session_id, agent_id, message_id),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def list_messages(
+        self,
+        session_id: str,
+        agent_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_message_id: Optional[int] = None,
+        **kwargs: Any,
+    ) -> list[SessionMessage]:
+        """List messages in id order: after after_message_id (keyset pagination) or skipping offset, up to limit."""
+        self.flush()
+        # LIMIT -1 is no limit
+        row_limit = -1 if limit is None else limit
+        if after_message_id is not None:
+            sql, parameters = _SELECT_MESSAGES + " LIMIT ?", (session_id, agent_id, after_message_id, row_limit)
+        else:
+            sql, parameters = _SELECT_MESSAGES + " LIMIT ? OFFSET ?", (session_id, agent_id, -1, row_limit, offset)
+        rows = self._connection().execute(sql, parameters).fetchall()
+        return [session_message(json.loads(data)) for (data,) in rows]
+
+    def iter_messages(self, session_id: str, agent_id: str, page_size: int = 500) -> Iterator[SessionMessage]:
+        """All messages of an agent, fetched page by page with keyset pagination."""
+        after = -1
+        while True:
+            page = self.list_messages(session_id, agent_id, limit=page_size, after_message_id=after)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1].message_id
+
+    def close(self) -> None:
+        self.flush()
+        self._closed = True
+        self._flush_requested.set()
+        for holder in list(self._connections):
+            holder.finalizer()
+        self._local = threading.local()
+
+
+_repositories: dict[str, SQLiteSessionRepository] = {}
+_repositories_lock = threading.Lock()
+
+
+def shared_repository(path: str, **kwargs: Any) -> SQLiteSessionRepository:
+    """The process-wide repository for a database file, so its connections are reused by every session manager."""
+    key = os.path.abspath(path)
+    with _repositories_lock:
+        repository = _repositories.get(key)
+        if repository is None:
+            repository = _repositories[key] = SQLiteSessionRepository(path, **kwargs)
+        return repository
+
+
+@atexit.register
+def _flush_repositories() -> None:
+    for repository in list(_open_repositories):
+        repository.flush()
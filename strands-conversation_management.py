@@ -27,6 +27,18 @@ conversation_manager = SlidingWindowConversationManager(
 agent = Agent(conversation_manager=conversation_manager)
 
 
+# TokenBudgetConversationManager
+# Trims to a token budget instead of a message count (a pasted document can overflow the context while ten short
+# turns waste it); message sizes are estimated once and tool-use / tool-result pairs stay intact (see token_budget.py)
+from token_budget import TokenBudgetConversationManager
+
+conversation_manager = TokenBudgetConversationManager(
+    max_tokens=50_000,  # Estimated tokens of conversation history to keep
+)
+
+agent = Agent(conversation_manager=conversation_manager)
+
+
 # SummarizingConversationManager
 
 from strands import Agent
@@ -81,4 +93,51 @@ conversation_manager = SummarizingConversationManager(
 
 agent = Agent(
     conversation_manager=conversation_manager
-)
\ No newline at end of file
+)
+
+
+# Background summarization
+# Starts summarizing older messages in the background once the conversation passes 70% of max_tokens and swaps the
+# summary in between turns, so no turn waits for the extra model call (see background_summary.py)
+from background_summary import BackgroundSummarizingConversationManager
+
+conversation_manager = BackgroundSummarizingConversationManager(
+    max_tokens=100_000,  # Estimated context budget for the conversation
+    soft_threshold=0.7,  # Start summarizing at 70% of the budget
+    preserve_recent_messages=8,
+    summarization_agent=custom_summarization_agent
+)
+
+agent = Agent(
+    conversation_manager=conversation_manager
+)
+
+
+# Hierarchical summaries
+# Each reduction only summarizes the newly evicted messages; summaries are cached by content hash and merged as a
+# tree, and the cache is kept in the session so a restored session doesn't summarize again (see summary_tree.py)
+from summary_tree import HierarchicalSummarizingConversationManager
+
+conversation_manager = HierarchicalSummarizingConversationManager(
+    summary_ratio=0.4,
+    preserve_recent_messages=8,
+    summarization_agent=custom_summarization_agent
+)
+
+agent = Agent(
+    conversation_manager=conversation_manager
+)
+
+
+# Retrieval-backed memory
+# Keeps the conversation within a token budget, but indexes trimmed messages locally (BM25, optionally embeddings)
+# and adds the most relevant ones back to each new prompt (see retrieval_memory.py)
+from retrieval_memory import RetrievalConversationManager
+
+conversation_manager = RetrievalConversationManager(
+    max_tokens=20_000,  # Estimated tokens of recent conversation to keep
+    top_k=5,  # Earlier messages retrieved per prompt
+    retrieval_tokens=2_000,  # Budget for the retrieved messages
+)
+
+agent = Agent(conversation_manager=conversation_manager)
@@ -19,6 +19,8 @@ Caching in Bedrock
 - Tool caching - BedrockModel param cache_tools="default"
 - System Prompt caching - BedrockModel param cache_prompt="default"
 - Message caching - use cachePoint in Agent Messages array
+- Automatic placement - CachePlanningModel(BedrockModel()) (prompt_cache.py) sets all of the above per request,
+  moving message checkpoints forward as the conversation grows, and reports cache read/write tokens + savings
 
 Reasoning support
 - Supported models only;
@@ -33,21 +35,16 @@ Structured Output:
 - For Tool Calling - specify schema for tool output - Agent.structured_output() translates required schema (JSON) to Bedrock's tool specification format
 - Agent.structured_output() or Agent.structured_output_async()
 - output_model = Pydantic BaseModel with schema for structured output
+- For many inputs, StructuredExtractor (structured_batch.py) runs the same extraction concurrently with retries
+- stream_structured_output() (structured_stream.py) yields partial models while the output streams, then the final one
 
 """
 
-from pydantic import BaseModel, Field
 from strands import Agent
 from strands.models import BedrockModel
-from typing import List, Optional
 
-class ProductAnalysis(BaseModel):
-    """Analyze product information from text."""
-    name: str = Field(description="Product name")
-    category: str = Field(description="Product category")
-    price: float = Field(description="Price in USD")
-    features: List[str] = Field(description="Key product features")
-    rating: Optional[float] = Field(description="Customer rating 1-5", ge=1, le=5)
+# Lives in schemas.py so other modules (e.g. the structured_batch.py CLI) can import it
+from schemas import ProductAnalysis
 
 bedrock_model = BedrockModel()
 
@@ -66,4 +63,30 @@ print(f"Product: {result.name}")
 print(f"Category: {result.category}")
 print(f"Price: ${result.price}")
 print(f"Features: {result.features}")
-print(f"Rating: {result.rating}")
\ No newline at end of file
+print(f"Rating: {result.rating}")
+
+
+# Streaming structured output - partial ProductAnalysis objects as fields complete, then the validated result
+# import asyncio
+# from structured_stream import stream_structured_output
+#
+# async def show_progress():
+#     async for event in stream_structured_output(agent, ProductAnalysis, "Analyze this product: The UltraBook Pro ..."):
+#         if "partial" in event:
+#             print(event["partial"])  # name/category first, then features one by one
+#         else:
+#             print(f"Final: {event['output']}")
+#
+# asyncio.run(show_progress())
+
+# Batch extraction - many descriptions at once, bounded concurrency, results appended to a JSONL file
+# import asyncio
+# from structured_batch import JsonlSink, StructuredExtractor
+#
+# descriptions = [
+#     ("ultrabook", "The UltraBook Pro is a premium laptop computer priced at $1,299 ..."),
+#     ("earbuds", "SoundPods are wireless earbuds for $129 with noise cancelling and 30h battery ..."),
+# ]
+# extractor = StructuredExtractor(ProductAnalysis, model=bedrock_model, concurrency=16)
+# summary = asyncio.run(extractor.run(descriptions, JsonlSink("product_analyses.jsonl")))
+# print(summary)  # succeeded, failed, retries, failure_rate, prompts_per_s, output_tokens_per_s, ...
@@ -59,6 +59,30 @@ agent = Agent(session_manager=session_manager)
 # Use the agent normally - state and messages will be persisted automatically
 agent("Hello, I'm a new user!")
 
+"""
+# Append-only log (single host, long sessions)
+# FileSessionManager writes one file per message and rewrites agent.json on every update; LogSessionManager keeps each
+# agent in an append-only segmented log instead (offset index, batched fsync, compaction, crash recovery), so a
+# 10k-message session is a handful of files and is restored with one sequential read (see session_log.py)
+
+/<sessions_dir>/
+└── session_<session_id>/
+    ├── session.json
+    └── agent_<agent_id>/
+        ├── segment_00000001.log    # messages and agent records, latest wins
+        ├── segment_00000001.idx    # offsets of a sealed segment
+        └── segment_00000002.log    # active segment
+"""
+
+from session_log import LogSessionManager
+
+session_manager = LogSessionManager(
+    session_id="user-123",
+    # storage_dir="/path/to/sessions"  # Optional, defaults to a temp directory
+)
+
+agent = Agent(session_manager=session_manager)
+
 """
 #S3 Session Manager (Distributed Environments)
 
@@ -123,41 +147,18 @@ Custom Session Repositories
 - Store session in bespoke storage backend 
 
 """
-from typing import Optional
+# A SessionRepository on SQLite (sqlite_session.py): WAL mode so FastAPI workers on one host share one database file,
+# a connection per thread, batched message inserts and keyset pagination over the (session_id, agent_id, message_id)
+# primary key. Implements create/read session, create/read/update agent and create/read/update/list messages.
 from strands import Agent
 from strands.session.repository_session_manager import RepositorySessionManager
-from strands.session.session_repository import SessionRepository
-from strands.types.session import Session, SessionAgent, SessionMessage
-
-class CustomSessionRepository(SessionRepository):
-    """Custom session repository implementation."""
-
-    def __init__(self):
-        """Initialize with your custom storage backend."""
-        # Initialize your storage backend (e.g., database connection)
-        self.db = YourDatabaseClient()
-
-    def create_session(self, session: Session) -> Session:
-        """Create a new session."""
-        self.db.sessions.insert(asdict(session))
-        return session
-
-    def read_session(self, session_id: str) -> Optional[Session]:
-        """Read a session by ID."""
-        data = self.db.sessions.find_one({"session_id": session_id})
-        if data:
-            return Session.from_dict(data)
-        return None
-
-    # Implement other required methods...
-    # create_agent, read_agent, update_agent
-    # create_message, read_message, update_message, list_messages
-
-# Use your custom repository with RepositorySessionManager
-custom_repo = CustomSessionRepository()
+from sqlite_session import shared_repository
+
+# One repository per process and database file, reused by every request's session manager
+session_repository = shared_repository("sessions.db")
 session_manager = RepositorySessionManager(
     session_id="user-789",
-    session_repository=custom_repo
+    session_repository=session_repository
 )
 
-agent = Agent(session_manager=session_manager)
\ No newline at end of file
+agent = Agent(session_manager=session_manager)
@@ -1,35 +1,185 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+import asyncio
+import time
+from typing import Literal, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from botocore.config import Config as BotocoreConfig
 from pydantic import BaseModel
-from strands import Agent
+from starlette.background import BackgroundTask
 from strands_tools import calculator, http_request
 
+from admission import AdmissionController, AdmissionRejected
+from agent_metrics import PROMETHEUS_CONTENT_TYPE, AgentMetrics
+from agent_pool import AgentPool
+from bedrock_clients import SharedBedrockModel, bedrock_clients
+from cancellation import CancellationHooks, CancellationScope, cancellation_metrics, install_bedrock_cancellation
+from rate_limiter import NO_RETRIES, RateLimitedModel, shared_limiter
+from response_cache import MemoryCacheBackend, ResponseCache
+from stream_framing import MEDIA_TYPES, coalesce, encode_batch, encode_batches, to_stream_events
+
 app = FastAPI()
 
+MAX_CONCURRENT_STREAMS = 8
+
+# One HTTP attempt per call: throttled calls are retried by the rate limiter, not by boto (see rate_limiter.py)
+bedrock_model = SharedBedrockModel(boto_client_config=NO_RETRIES.merge(BotocoreConfig(read_timeout=120)))
+install_bedrock_cancellation(bedrock_model)
+
+# Agents are built once at startup and reused across requests (see agent_pool.py)
+agent_pool = AgentPool(
+    size=MAX_CONCURRENT_STREAMS,
+    # Model calls queue on a process-wide limiter that backs off when Bedrock throttles (see rate_limiter.py)
+    model=RateLimitedModel(bedrock_model, shared_limiter),
+    tools=[calculator, http_request],
+    callback_handler=None,
+    # Stop model calls and tool calls for requests that were cancelled (see cancellation.py)
+    hooks=[CancellationHooks()]
+)
+
+# Caps concurrent streams and queues the rest fairly per tenant (see admission.py)
+admission = AdmissionController(
+    max_concurrent=MAX_CONCURRENT_STREAMS,
+    max_queue_depth=64,
+    max_tenant_queue_depth=16,
+    max_queue_wait=30.0
+)
+
+# Exact-match cache of recorded responses, replayed for repeated prompts (see response_cache.py)
+# For a cache that survives restarts: ResponseCache(DiskCacheBackend("/tmp/strands-response-cache"))
+response_cache = ResponseCache(MemoryCacheBackend(max_entries=1024, ttl=3600))
+
+# Per-request agent metrics aggregated into histograms and counters, served on /metrics (see agent_metrics.py)
+agent_metrics = AgentMetrics()
+agent_metrics.add_collector(
+    "strands_pool", agent_pool.stats, counters=("checkouts", "waited_checkouts", "total_wait_seconds")
+)
+agent_metrics.add_collector("strands_admission", admission.stats, counters=("admitted", "rejected_429", "rejected_503"))
+agent_metrics.add_collector("strands_cache", response_cache.stats, counters=("hits", "misses", "stores", "bypassed"))
+agent_metrics.add_collector(
+    "strands_bedrock", bedrock_clients.stats, counters=("clients_created", "lookups", "connections_created", "requests")
+)
+agent_metrics.add_collector("strands_rate_limit", shared_limiter.stats, counters=("granted", "throttled"))
+
 class PromptRequest(BaseModel):
     prompt: str
 
 @app.post("/stream")
-async def stream_response(request: PromptRequest):
-    async def generate():
-        agent = Agent(
-            tools=[calculator, http_request],
-            callback_handler=None
+async def stream_response(
+    prompt_request: PromptRequest,
+    request: Request,
+    x_tenant_id: str = Header(default="default"),
+    # Time budget for the whole request (queueing, model cycles and tool calls), in milliseconds
+    x_deadline_ms: Optional[int] = Header(default=None, ge=1),
+    # "no-cache" skips the cache lookup (the fresh response is still stored)
+    cache_control: Optional[str] = Header(default=None),
+    # text (plain chunks), sse or ndjson (framed, with tool-use and lifecycle events) - see stream_framing.py
+    stream_format: Literal["text", "sse", "ndjson"] = Query(default="text", alias="format"),
+    # Chunks are coalesced and flushed every flush_ms or once flush_bytes are buffered
+    flush_ms: float = Query(default=20, ge=0),
+    flush_bytes: int = Query(default=4096, ge=1),
+):
+    started = time.monotonic()
+
+    # Cache hits are replayed without taking a concurrency slot or an agent
+    cache_key = response_cache.key(prompt_request.prompt, agent_pool.tool_names, agent_pool.model.get_config())
+    cached = None if cache_control == "no-cache" else response_cache.get(cache_key)
+    if cached is not None:
+        return StreamingResponse(
+            encode_batches(response_cache.replay(cached), stream_format),
+            media_type=MEDIA_TYPES[stream_format],
+            headers={"X-Cache": "HIT"}
         )
 
+    scope = CancellationScope(timeout=x_deadline_ms / 1000 if x_deadline_ms else None)
+
+    # Admit (or reject with 429/503) before the response starts, so errors are real HTTP statuses.
+    # Time spent queued counts against the deadline.
+    try:
+        permit = await admission.acquire(x_tenant_id, max_wait=scope.remaining())
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    async def watch_disconnect():
+        # Notice a disconnect even while nothing is being written (e.g. during a long tool call)
+        while not scope.done:
+            if await request.is_disconnected():
+                scope.cancel("client_disconnected")
+                return
+            await asyncio.sleep(0.25)
+
+    async def generate():
+        watcher = asyncio.create_task(watch_disconnect())
         try:
-            async for event in agent.stream_async(request.prompt):
-                if "data" in event:
-                    # Only stream text chunks to the client
-                    yield event["data"]
-        except Exception as e:
-            yield f"Error: {str(e)}"
+            async with agent_pool.checkout() as agent:
+                with scope.activate():
+                    error = None
+                    try:
+                        batches = coalesce(
+                            to_stream_events(scope.guard(agent.stream_async(prompt_request.prompt))),
+                            flush_interval=flush_ms / 1000,
+                            max_bytes=flush_bytes
+                        )
+                        batches = agent_metrics.time_first_token(batches, started)
+                        async for chunk in encode_batches(response_cache.record(cache_key, batches), stream_format):
+                            yield chunk
+                    except Exception as e:
+                        error = e
+                        if stream_format == "text":
+                            yield f"Error: {str(e)}"
+                        else:
+                            yield encode_batch([{"type": "error", "message": str(e)}], stream_format)
+                    finally:
+                        # Read the metrics before the agent goes back to the pool (which resets them)
+                        if scope.reason:
+                            status = scope.reason
+                        elif error is not None:
+                            status = "error"
+                        else:
+                            status = "ok" if scope.done else "client_disconnected"
+                        agent_metrics.observe(agent.event_loop_metrics, time.monotonic() - started, status)
+        finally:
+            watcher.cancel()
+            # No-op if the stream completed; otherwise the response was torn down under us
+            scope.cancel("client_disconnected")
+            permit.release()
 
     return StreamingResponse(
         generate(),
-        media_type="text/plain"
+        media_type=MEDIA_TYPES[stream_format],
+        headers={"X-Cache": "MISS"},
+        # Also release if the stream is never started (e.g. client went away)
+        background=BackgroundTask(permit.release)
     )
 
+@app.get("/pool")
+async def pool_stats():
+    return agent_pool.stats()
+
+@app.get("/admission")
+async def admission_stats():
+    return admission.stats()
+
+@app.get("/cache")
+async def cache_stats():
+    return response_cache.stats()
+
+@app.get("/cancellation")
+async def cancellation_stats():
+    return cancellation_metrics
+
+@app.get("/bedrock-clients")
+async def bedrock_client_stats():
+    return bedrock_clients.stats()
+
+@app.get("/rate-limit")
+async def rate_limit_stats():
+    return shared_limiter.stats()
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(agent_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,11 +1,203 @@
+"""
+Streaming client & load generator for the FastAPI /stream endpoint (strands-streaming-fastAPI.py)
+
+Single request (prints the streamed answer):
+    python strands-streaming-fastapi-request.py
+
+Load test:
+    # closed loop - 16 connections, each sends its next request as soon as the previous one finishes
+    python strands-streaming-fastapi-request.py --concurrency 16 --requests 200
+
+    # open loop - Poisson arrivals at 5 req/s regardless of how fast responses come back
+    python strands-streaming-fastapi-request.py --rate 5 --requests 200 --csv raw.csv --json summary.json
+
+Per request it records time-to-first-byte, time-to-first-token (framed formats), inter-chunk gaps and total latency,
+then prints p50/p90/p99 summaries plus throughput. --csv / --json write the raw per-request numbers.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import time
+from typing import Any, Optional
+
+import httpx
 import requests
 
-response = requests.post(
-    "http://localhost:8000/stream",
-    json={"prompt": "What is 42+7 and tell me about Paris?"},
-    stream=True
-)
+from stream_framing import decoder_for
+
+URL = "http://localhost:8000/stream"
+PROMPT = "What is 42+7 and tell me about Paris?"
+
+
+def single_request(url: str, prompt: str, stream_format: str) -> None:
+    response = requests.post(
+        url,
+        params={"format": stream_format, "flush_ms": 20},
+        json={"prompt": prompt},
+        stream=True
+    )
+
+    decoder = decoder_for(stream_format)
+    # Without a charset in the Content-Type, iter_content(decode_unicode=True) yields bytes
+    response.encoding = response.encoding or "utf-8"
+
+    for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+        if not chunk:
+            continue
+
+        if decoder is None:
+            print(chunk, end='', flush=True)
+            continue
+
+        for event in decoder.feed(chunk):
+            if event["type"] == "text":
+                print(event["data"], end='', flush=True)
+            elif event["type"] == "tool_use":
+                print(f"\n[Using tool: {event['name']}]")
+            elif event["type"] == "complete":
+                print(f"\n[Complete: {event['stop_reason']}]")
+            elif event["type"] == "error":
+                print(f"\n[Error: {event['message']}]")
+
+
+async def timed_request(client: httpx.AsyncClient, args: argparse.Namespace) -> dict[str, Any]:
+    """Send one streaming request and time it."""
+    headers = {"X-Tenant-Id": args.tenant}
+    if args.deadline_ms:
+        headers["X-Deadline-Ms"] = str(args.deadline_ms)
+    if args.no_cache:
+        headers["Cache-Control"] = "no-cache"
+
+    decoder = decoder_for(args.format)
+    record: dict[str, Any] = {"status": None, "ttfb": None, "ttft": None, "total": None, "chunks": 0, "bytes": 0}
+    gaps: list[float] = []
+
+    start = time.perf_counter()
+    last = None
+    try:
+        async with client.stream(
+            "POST", args.url, params={"format": args.format}, json={"prompt": args.prompt}, headers=headers
+        ) as response:
+            record["status"] = response.status_code
+            async for chunk in response.aiter_text():
+                if not chunk:
+                    continue
+                now = time.perf_counter()
+                if last is None:
+                    record["ttfb"] = now - start
+                else:
+                    gaps.append(now - last)
+                last = now
+                record["chunks"] += 1
+                record["bytes"] += len(chunk.encode())
+
+                if record["ttft"] is None:
+                    if decoder is None or any(event["type"] == "text" for event in decoder.feed(chunk)):
+                        record["ttft"] = now - start
+    except httpx.HTTPError as e:
+        record["error"] = str(e)
+
+    record["total"] = time.perf_counter() - start
+    record["max_gap"] = max(gaps) if gaps else None
+    record["gaps"] = gaps
+    return record
+
+
+async def closed_loop(args: argparse.Namespace, client: httpx.AsyncClient) -> list[dict[str, Any]]:
+    """args.concurrency connections, each firing its next request when the previous one completes."""
+    results: list[dict[str, Any]] = []
+    remaining = args.requests
+
+    async def connection() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            results.append(await timed_request(client, args))
+
+    await asyncio.gather(*(connection() for _ in range(args.concurrency)))
+    return results
+
+
+async def open_loop(args: argparse.Namespace, client: httpx.AsyncClient) -> list[dict[str, Any]]:
+    """Poisson arrivals at args.rate requests/second, independent of response times."""
+    tasks = []
+    for _ in range(args.requests):
+        tasks.append(asyncio.create_task(timed_request(client, args)))
+        await asyncio.sleep(random.expovariate(args.rate))
+    return list(await asyncio.gather(*tasks))
+
+
+def percentiles(values: list[float]) -> Optional[dict[str, float]]:
+    if not values:
+        return None
+    values = sorted(values)
+
+    def pick(p: float) -> float:
+        return round(values[min(len(values) - 1, int(p * len(values)))], 4)
+
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": round(values[-1], 4)}
+
+
+def summarize(results: list[dict[str, Any]], elapsed: float) -> dict[str, Any]:
+    ok = [r for r in results if r["status"] == 200 and "error" not in r]
+    status_codes: dict[str, int] = {}
+    for r in results:
+        status_codes[str(r["status"])] = status_codes.get(str(r["status"]), 0) + 1
+
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "status_codes": status_codes,
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_s": round(len(ok) / elapsed, 2),
+        "bytes_per_s": round(sum(r["bytes"] for r in ok) / elapsed, 1),
+        "ttfb_s": percentiles([r["ttfb"] for r in ok if r["ttfb"] is not None]),
+        "ttft_s": percentiles([r["ttft"] for r in ok if r["ttft"] is not None]),
+        "total_s": percentiles([r["total"] for r in ok]),
+        "inter_chunk_gap_s": percentiles([gap for r in ok for gap in r["gaps"]]),
+    }
+
+
+async def load_test(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(None, connect=10), limits=limits) as client:
+        start = time.perf_counter()
+        results = await (open_loop(args, client) if args.rate else closed_loop(args, client))
+        elapsed = time.perf_counter() - start
+
+    summary = summarize(results, elapsed)
+    print(json.dumps(summary, indent=2))
+
+    if args.csv:
+        fields = ["status", "ttfb", "ttft", "total", "max_gap", "chunks", "bytes", "error"]
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "requests": results}, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream from /stream once, or load test it")
+    parser.add_argument("--url", default=URL)
+    parser.add_argument("--prompt", default=PROMPT)
+    parser.add_argument("--format", default="sse", choices=["text", "sse", "ndjson"])
+    parser.add_argument("--tenant", default="default", help="X-Tenant-Id header")
+    parser.add_argument("--deadline-ms", type=int, help="X-Deadline-Ms header")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the server's response cache")
+    parser.add_argument("--requests", type=int, help="Total requests to send (enables load test mode)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: concurrent connections")
+    parser.add_argument("--rate", type=float, help="Open loop: mean arrivals per second (Poisson)")
+    parser.add_argument("--csv", help="Write raw per-request results as CSV")
+    parser.add_argument("--json", help="Write summary and raw results as JSON")
+    args = parser.parse_args()
 
-for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
-    if chunk:
-        print(chunk, end='', flush=True)
+    if args.requests:
+        asyncio.run(load_test(args))
+    else:
+        single_request(args.url, args.prompt, args.format)
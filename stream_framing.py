@@ -0,0 +1,207 @@
+"""
+Stream Framing
+
+- Turns raw agent.stream_async() events into small typed events (text, tool_use, lifecycle, error)
+- Coalesces them into batches flushed by time window (e.g. 20 ms) or byte size, so a long answer costs a few
+  socket writes instead of one per token
+- The first text chunk is flushed immediately, so time-to-first-byte is unchanged
+- Encodes each batch as one write in one of three formats:
+    - text   - plain text chunks only (the original /stream behaviour)
+    - sse    - Server-Sent Events, "event: <type>" + "data: <json>" per event
+    - ndjson - one JSON object per line
+- SSEDecoder / NDJSONDecoder parse the framed formats back into events on the client side
+
+Event shapes:
+    {"type": "start"}
+    {"type": "cycle_start"}
+    {"type": "text", "data": "..."}
+    {"type": "tool_use", "name": "calculator", "toolUseId": "..."}
+    {"type": "message", "role": "assistant"}
+    {"type": "complete", "stop_reason": "end_turn"}
+    {"type": "error", "message": "..."}
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+
+MEDIA_TYPES = {
+    "text": "text/plain",
+    "sse": "text/event-stream",
+    # Starlette only adds a charset to text/* types, and clients need it to decode the stream
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+
+async def to_stream_events(agent_events: AsyncIterator[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    """Map raw agent events to the typed events above."""
+    seen_tool_uses = set()
+
+    async for event in agent_events:
+        if "data" in event:
+            yield {"type": "text", "data": event["data"]}
+        elif "current_tool_use" in event and event["current_tool_use"].get("name"):
+            # Tool input arrives as many deltas - only announce each tool use once
+            tool_use = event["current_tool_use"]
+            if tool_use.get("toolUseId") not in seen_tool_uses:
+                seen_tool_uses.add(tool_use.get("toolUseId"))
+                yield {"type": "tool_use", "name": tool_use["name"], "toolUseId": tool_use.get("toolUseId")}
+        elif event.get("init_event_loop", False):
+            yield {"type": "start"}
+        elif event.get("start_event_loop", False):
+            yield {"type": "cycle_start"}
+        elif "message" in event:
+            yield {"type": "message", "role": event["message"]["role"]}
+        elif "result" in event:
+            yield {"type": "complete", "stop_reason": event["result"].stop_reason}
+        elif event.get("force_stop", False):
+            yield {"type": "error", "message": event.get("force_stop_reason", "unknown reason")}
+
+
+_END = object()
+
+
+async def coalesce(
+    events: AsyncIterator[dict[str, Any]],
+    flush_interval: float = 0.02,
+    max_bytes: int = 4096,
+    flush_first: bool = True,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Batch events, flushing when the window elapses or the buffered text exceeds max_bytes.
+
+    Consecutive text events are merged into one. The window is measured from the first buffered event,
+    and a pending batch is flushed on time even if the source goes quiet (e.g. during a tool call).
+    """
+    # The source is drained by a single task so the agent's stream (and its tracing context) stays on one task
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async for event in events:
+                queue.put_nowait(event)
+            queue.put_nowait(_END)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    producer = asyncio.create_task(pump())
+    batch: list[dict[str, Any]] = []
+    batch_bytes = 0
+    deadline: Optional[float] = None
+    sent_first_text = not flush_first
+
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # Window elapsed with the next event still outstanding
+                yield batch
+                batch, batch_bytes, deadline = [], 0, None
+                continue
+
+            if event is _END:
+                break
+            if isinstance(event, Exception):
+                if batch:
+                    yield batch
+                raise event
+
+            if event["type"] == "text" and batch and batch[-1]["type"] == "text":
+                batch[-1] = {"type": "text", "data": batch[-1]["data"] + event["data"]}
+            else:
+                batch.append(event)
+            if event["type"] == "text":
+                batch_bytes += len(event["data"].encode())
+
+            if deadline is None:
+                deadline = time.monotonic() + flush_interval
+
+            if batch_bytes >= max_bytes or flush_interval <= 0 or (event["type"] == "text" and not sent_first_text):
+                sent_first_text = sent_first_text or event["type"] == "text"
+                yield batch
+                batch, batch_bytes, deadline = [], 0, None
+
+        if batch:
+            yield batch
+    finally:
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+
+def encode_batch(batch: list[dict[str, Any]], fmt: str = "sse") -> str:
+    """Encode a batch of events as a single write."""
+    if fmt == "text":
+        return "".join(event["data"] for event in batch if event["type"] == "text")
+    if fmt == "sse":
+        return "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in batch)
+    if fmt == "ndjson":
+        return "".join(json.dumps(event) + "\n" for event in batch)
+    raise ValueError(f"Unknown stream format: {fmt}")
+
+
+async def encode_batches(batches: AsyncIterator[list[dict[str, Any]]], fmt: str = "sse") -> AsyncIterator[str]:
+    """Event batches -> encoded writes, one per non-empty batch."""
+    async for batch in batches:
+        chunk = encode_batch(batch, fmt)
+        if chunk:
+            yield chunk
+
+
+def encode_stream(
+    events: AsyncIterator[dict[str, Any]],
+    fmt: str = "sse",
+    flush_interval: float = 0.02,
+    max_bytes: int = 4096,
+) -> AsyncIterator[str]:
+    """Typed events -> coalesced, encoded writes."""
+    return encode_batches(coalesce(events, flush_interval, max_bytes), fmt)
+
+
+def framed_stream(
+    agent_events: AsyncIterator[dict[str, Any]],
+    fmt: str = "sse",
+    flush_interval: float = 0.02,
+    max_bytes: int = 4096,
+) -> AsyncIterator[str]:
+    """agent.stream_async() events -> coalesced, encoded writes."""
+    return encode_stream(to_stream_events(agent_events), fmt, flush_interval, max_bytes)
+
+
+class SSEDecoder:
+    """Incremental Server-Sent Events decoder; feed() it text chunks as they arrive."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> Iterator[dict[str, Any]]:
+        self._buffer += chunk
+        while "\n\n" in self._buffer:
+            frame, self._buffer = self._buffer.split("\n\n", 1)
+            data = "\n".join(line[5:].lstrip() for line in frame.split("\n") if line.startswith("data:"))
+            if data:
+                yield json.loads(data)
+
+
+class NDJSONDecoder:
+    """Incremental NDJSON decoder; feed() it text chunks as they arrive."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> Iterator[dict[str, Any]]:
+        self._buffer += chunk
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            if line.strip():
+                yield json.loads(line)
+
+
+def decoder_for(fmt: str) -> Optional[Any]:
+    """Client-side decoder for a stream format (None for plain text)."""
+    return {"sse": SSEDecoder, "ndjson": NDJSONDecoder}.get(fmt, lambda: None)()
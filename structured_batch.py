@@ -0,0 +1,313 @@
+"""
+Batch Structured Output Extraction
+
+- Extracts a Pydantic model (e.g. ProductAnalysis from schemas.py) from every text in a large input,
+  several at a time
+- Input is an iterator of (id, text) pairs or a JSONL file streamed line by line (see batch_runner.read_prompts)
+- The schema is converted to a tool spec once and reused for every call (Agent.structured_output_async converts it
+  on each call); each call is the same forced tool call BedrockModel.structured_output makes
+- Every result is validated against the model; invalid output, throttling and transient errors are retried with
+  exponential backoff and jitter
+- Results go to a JSONL sink as they complete; it is resumable (ids already extracted are skipped) and a crash loses
+  at most a partly written last line
+- write_parquet() converts a finished JSONL file to Parquet (needs pyarrow), with the output model's fields as a
+  struct column; Parquet is not written during a run, because a Parquet file can't be appended to or read back
+  until it is closed
+- Reports throughput (records/sec, tokens/sec) and failure rate while running and at the end
+
+Usage:
+    python structured_batch.py products.jsonl analyses.jsonl --schema schemas:ProductAnalysis --concurrency 32
+
+    extractor = StructuredExtractor(ProductAnalysis, model=BedrockModel(), concurrency=32)
+    summary = asyncio.run(extractor.run(read_prompts("products.jsonl", "id", "description"), JsonlSink("out.jsonl")))
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from types import UnionType
+from typing import (
+    Any, Callable, Generic, Iterable, Iterator, Literal, Optional, Type, TypeVar, Union, get_args, get_origin
+)
+
+from pydantic import BaseModel, ValidationError
+from strands.models import Model
+from strands.tools.structured_output import convert_pydantic_to_tool_spec
+from strands.types.exceptions import ContextWindowOverflowException
+
+from batch_runner import BatchStats, _ends_with_newline, completed_ids, read_prompts
+from bedrock_clients import SharedBedrockModel
+from model_utils import structured_output
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class ExtractionStats(BatchStats):
+    """BatchStats plus retry and failure-rate reporting."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.retries = 0
+        self.invalid_outputs = 0
+
+    def summary(self) -> dict[str, Any]:
+        summary = super().summary()
+        finished = self.succeeded + self.failed
+        summary["retries"] = self.retries
+        summary["invalid_outputs"] = self.invalid_outputs
+        summary["failure_rate"] = round(self.failed / finished, 4) if finished else 0.0
+        return summary
+
+
+class JsonlSink:
+    """Appends one JSON record per line, flushed as each result completes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = completed_ids(path)
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not _ends_with_newline(path):
+            self._file.write("\n")
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def write_parquet(
+    jsonl_path: str, parquet_path: str, output_model: Type[BaseModel], row_group_size: int = 10_000
+) -> int:
+    """Convert a JsonlSink output file to Parquet (needs pyarrow). Returns the number of rows written.
+
+    Each id gets one row, from its latest record (a resumed run appends a new record after a failed one). The output
+    is a struct column with the output model's fields. The file is written next to parquet_path and renamed into
+    place when complete, so parquet_path never holds a partly written (unreadable) file.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("write_parquet requires pyarrow: pip install -e '.[parquet]'") from e
+
+    output_type, convert_output = _arrow_field(pa, output_model)
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("status", pa.string()),
+        ("output", output_type),
+        ("error", pa.string()),
+        ("attempts", pa.int32()),
+        ("latency_s", pa.float64()),
+    ])
+
+    latest = {record["id"]: line_number for line_number, record in _jsonl_records(jsonl_path)}
+    rows: list[dict[str, Any]] = []
+    written = 0
+    partial_path = parquet_path + ".partial"
+    with pq.ParquetWriter(partial_path, schema) as writer:
+        for line_number, record in _jsonl_records(jsonl_path):
+            if latest[record["id"]] != line_number:
+                continue
+            rows.append({**record, "output": convert_output(record.get("output"))})
+            if len(rows) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                written += len(rows)
+                rows = []
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            written += len(rows)
+    os.replace(partial_path, parquet_path)
+    return written
+
+
+def _jsonl_records(path: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Blank line, or a partially written last line from a crash
+                continue
+            yield line_number, record
+
+
+def _arrow_field(pa: Any, annotation: Any) -> tuple[Any, Callable[[Any], Any]]:
+    """Arrow type for a model field annotation, and a function converting the field's JSON value to it."""
+    origin = get_origin(annotation)
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    if origin in (Union, UnionType) and len(args) == 1:
+        return _arrow_field(pa, args[0])
+    if origin in (list, set, frozenset, tuple) and len(args) == 1:
+        item_type, convert_item = _arrow_field(pa, args[0])
+        return pa.list_(item_type), lambda value: None if value is None else [convert_item(item) for item in value]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        fields = {name: _arrow_field(pa, field.annotation) for name, field in annotation.model_fields.items()}
+        struct = pa.struct([(name, arrow_type) for name, (arrow_type, _) in fields.items()])
+        return struct, lambda value: None if value is None else {
+            name: convert(value.get(name)) for name, (_, convert) in fields.items()
+        }
+    if origin is Literal and all(isinstance(arg, str) for arg in args):
+        return pa.string(), _unchanged
+    for python_type, arrow_type in ((bool, pa.bool_()), (int, pa.int64()), (float, pa.float64()), (str, pa.string())):
+        # bool before int (bool is an int subclass); str also covers str enums
+        if isinstance(annotation, type) and issubclass(annotation, python_type):
+            return arrow_type, _unchanged
+    # Anything else (dicts, unions, datetimes, ...) is kept as text: strings as they are, other values as JSON
+    return pa.string(), _as_text
+
+
+def _as_text(value: Any) -> Optional[str]:
+    return value if value is None or isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _unchanged(value: Any) -> Any:
+    return value
+
+
+class StructuredExtractor(Generic[T]):
+    """Runs structured output extraction over many inputs with bounded concurrency and retries."""
+
+    def __init__(
+        self,
+        output_model: Type[T],
+        model: Optional[Model] = None,
+        system_prompt: Optional[str] = None,
+        concurrency: int = 16,
+        max_attempts: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.output_model = output_model
+        self.model = model or SharedBedrockModel()
+        self.system_prompt = system_prompt
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Converted once, reused for every call
+        self.tool_spec = convert_pydantic_to_tool_spec(output_model)
+
+    async def extract(self, text: str, stats: Optional[ExtractionStats] = None) -> tuple[T, int]:
+        """Extract one record, retrying with backoff. Returns the validated output and the attempts it took.
+
+        The exception raised when it gives up carries the attempts made as its attempts attribute.
+        """
+        messages = [{"role": "user", "content": [{"text": text}]}]
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                output = None
+                async for event in structured_output(
+                    self.model, self.output_model, messages, self.system_prompt, tool_spec=self.tool_spec
+                ):
+                    if "stop" in event and stats is not None:
+                        usage = event["stop"][2]
+                        stats.input_tokens += usage.get("inputTokens", 0)
+                        stats.output_tokens += usage.get("outputTokens", 0)
+                    elif "output" in event:
+                        output = event["output"]
+                if output is None:
+                    raise ValueError("No structured output was returned")
+                return output, attempt
+            except ContextWindowOverflowException as e:
+                # Won't get better on retry
+                e.attempts = attempt  # type: ignore[attr-defined]
+                raise
+            except Exception as e:
+                if isinstance(e, ValidationError) and stats is not None:
+                    stats.invalid_outputs += 1
+                if attempt == self.max_attempts:
+                    e.attempts = attempt  # type: ignore[attr-defined]
+                    raise
+                if stats is not None:
+                    stats.retries += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                logger.debug("attempt=<%d>, error=<%s> | extraction failed, retrying in %.1fs", attempt, e, delay)
+                # Full jitter, so concurrent workers don't retry in lockstep
+                await asyncio.sleep(random.uniform(0, delay))
+        raise AssertionError("unreachable")
+
+    async def run(
+        self,
+        inputs: Iterable[tuple[str, str]],
+        sink: Any,
+        report_every: Optional[float] = 10.0,
+    ) -> dict[str, Any]:
+        """Extract every (id, text) in inputs, writing each result to sink as it completes."""
+        stats = ExtractionStats()
+        done = getattr(sink, "done", set())
+        queue: asyncio.Queue[Optional[tuple[str, str]]] = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker() -> None:
+            while (item := await queue.get()) is not None:
+                item_id, text = item
+                start = time.monotonic()
+                try:
+                    output, attempts = await self.extract(text, stats)
+                    # JSON mode, so every output (dates, enums, ...) can be written to the JSONL file
+                    output_json = output.model_dump(mode="json")
+                    record = {"id": item_id, "status": "ok", "output": output_json, "attempts": attempts}
+                    stats.succeeded += 1
+                except Exception as e:
+                    attempts = getattr(e, "attempts", self.max_attempts)
+                    record = {"id": item_id, "status": "error", "error": str(e), "attempts": attempts}
+                    stats.failed += 1
+                record["latency_s"] = round(time.monotonic() - start, 3)
+                sink.write(record)
+
+        async def reporter() -> None:
+            while True:
+                await asyncio.sleep(report_every)
+                print(json.dumps(stats.summary()), flush=True)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        progress = asyncio.create_task(reporter()) if report_every else None
+        try:
+            for item_id, text in inputs:
+                if item_id in done:
+                    stats.skipped += 1
+                    continue
+                await queue.put((item_id, text))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            if progress:
+                progress.cancel()
+            for task in workers:
+                task.cancel()
+            sink.close()
+
+        return stats.summary()
+
+
+if __name__ == "__main__":
+    import importlib
+
+    parser = argparse.ArgumentParser(description="Extract structured records from a JSONL file of texts")
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("output", help="Output JSONL file (appended to, so an interrupted run can be resumed)")
+    parser.add_argument("--parquet", help="Also write the results to this Parquet file once the run finishes")
+    parser.add_argument("--schema", required=True, help="Pydantic model to extract, as module:ClassName")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-attempts", type=int, default=4)
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--text-field", default="description")
+    args = parser.parse_args()
+
+    module_name, class_name = args.schema.split(":")
+    output_model = getattr(importlib.import_module(module_name), class_name)
+
+    extractor = StructuredExtractor(output_model, concurrency=args.concurrency, max_attempts=args.max_attempts)
+    prompts = read_prompts(args.input, args.id_field, args.text_field)
+    summary = asyncio.run(extractor.run(prompts, JsonlSink(args.output)))
+    print(json.dumps(summary))
+    if args.parquet:
+        write_parquet(args.output, args.parquet, output_model)
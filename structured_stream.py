@@ -0,0 +1,232 @@
+"""
+Streaming Structured Output
+
+- agent.structured_output() returns nothing until the whole object is generated
+- stream_structured_output() makes the same forced tool call, but parses the tool input JSON incrementally as it
+  streams and yields progressively filled partial models: fields appear as soon as their value is complete
+  (e.g. name and category first), and list items are added one by one (features)
+- The last event is the fully validated model
+- The parser is incremental: each chunk is processed once, so parsing is linear in the output size
+  (each partial handed out is its own copy and doesn't change afterwards)
+- Breaking out of the loop stops the stream early, e.g. once the fields a UI needs are present
+
+Usage:
+    async for event in stream_structured_output(agent, ProductAnalysis, "Analyze this product: ..."):
+        if "partial" in event:
+            print(event["partial"].name, event["partial"].features)    # None until known
+        elif "output" in event:
+            result = event["output"]                                    # validated ProductAnalysis
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Optional, Type, TypeVar, Union, cast
+
+from pydantic import BaseModel, create_model
+from strands import Agent
+from strands.models import Model
+from strands.tools.structured_output import convert_pydantic_to_tool_spec
+from strands.types.content import Messages
+from strands.types.tools import ToolChoice, ToolSpec
+
+T = TypeVar("T", bound=BaseModel)
+
+_WHITESPACE = " \t\r\n"
+
+
+class PartialJSONParser:
+    """Incremental JSON parser that exposes the value parsed so far.
+
+    Containers are built in place as their opening bracket arrives; scalars (strings, numbers, literals) are only
+    added once complete, unless partial_strings is set, in which case a string being streamed is visible too.
+    """
+
+    def __init__(self, partial_strings: bool = False):
+        self.partial_strings = partial_strings
+        self.value: Any = None
+        self.done = False
+        # Incremented whenever a value is added, so callers can tell if anything changed
+        self.version = 0
+        self._text: list[str] = []
+        # Open containers, innermost last; for dicts, the key whose value is being parsed
+        self._stack: list[Any] = []
+        self._key: list[Optional[str]] = []
+        self._expect_key = False
+        # Scalar being parsed: string (raw, still escaped) or number / literal
+        self._string: Optional[list[str]] = None
+        self._escape = False
+        self._scalar: list[str] = []
+
+    def feed(self, chunk: str) -> None:
+        self._text.append(chunk)
+        for char in chunk:
+            if self._string is not None:
+                self._string_char(char)
+            elif char in _WHITESPACE:
+                self._end_scalar()
+            elif char == '"':
+                self._end_scalar()
+                self._string = []
+            elif char in "{[":
+                container: Any = {} if char == "{" else []
+                self._add(container)
+                self._stack.append(container)
+                self._key.append(None)
+                self._expect_key = char == "{"
+            elif char in "}]":
+                self._end_scalar()
+                self._stack.pop()
+                self._key.pop()
+                self._expect_key = False
+                if not self._stack:
+                    self.done = True
+            elif char == ":":
+                self._expect_key = False
+            elif char == ",":
+                self._end_scalar()
+                self._expect_key = bool(self._stack) and isinstance(self._stack[-1], dict)
+            else:
+                self._scalar.append(char)
+
+    def _string_char(self, char: str) -> None:
+        assert self._string is not None
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            text = json.loads('"' + "".join(self._string) + '"')
+            self._string = None
+            if self._expect_key:
+                self._key[-1] = text
+            else:
+                self._add(text)
+            return
+        self._string.append(char)
+
+    def _end_scalar(self) -> None:
+        if self._scalar:
+            self._add(json.loads("".join(self._scalar)))
+            self._scalar = []
+
+    def _add(self, value: Any) -> None:
+        self.version += 1
+        if not self._stack:
+            self.value = value
+            self.done = not isinstance(value, (dict, list))
+        elif isinstance(self._stack[-1], list):
+            self._stack[-1].append(value)
+        else:
+            self._stack[-1][self._key[-1]] = value
+
+    def snapshot(self) -> Any:
+        """Copy of the value parsed so far, including the string being streamed if partial_strings."""
+        pending = self._pending_string()
+        if pending is None:
+            return _copy(self.value)
+
+        parent = self._stack[-1]
+        if isinstance(parent, list):
+            parent.append(pending)
+            try:
+                return _copy(self.value)
+            finally:
+                parent.pop()
+        key = self._key[-1]
+        parent[key] = pending
+        try:
+            return _copy(self.value)
+        finally:
+            del parent[key]
+
+    def _pending_string(self) -> Optional[str]:
+        if not self.partial_strings or self._string is None or self._expect_key or not self._stack:
+            return None
+        text = "".join(self._string)
+        if self._escape:
+            text = text[:-1]
+        try:
+            return json.loads('"' + text + '"')
+        except ValueError:
+            # Cut inside a \uXXXX escape
+            return json.loads('"' + text[: text.rfind("\\")] + '"')
+
+    def text(self) -> str:
+        return "".join(self._text)
+
+
+def _copy(value: Any) -> Any:
+    """Copy of a parsed JSON value, so partials already handed out don't change as parsing continues."""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+@lru_cache(maxsize=None)
+def partial_model(output_model: Type[BaseModel]) -> Type[BaseModel]:
+    """Variant of output_model with every field optional (None until it has streamed)."""
+    fields = {
+        name: (Optional[field.annotation], None)  # type: ignore[valid-type]
+        for name, field in output_model.model_fields.items()
+    }
+    return create_model(f"Partial{output_model.__name__}", **fields)  # type: ignore[call-overload]
+
+
+async def stream_structured_output(
+    agent_or_model: Union[Agent, Model],
+    output_model: Type[T],
+    prompt: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+    tool_spec: Optional[ToolSpec] = None,
+    partial_strings: bool = False,
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Structured output as a stream of {"partial": ...} events followed by {"output": validated model}.
+
+    With an Agent, the prompt is used on top of its conversation (not added to it) with its system prompt,
+    like agent.structured_output(); with a Model, the prompt is the only message.
+    """
+    if isinstance(agent_or_model, Agent):
+        model = agent_or_model.model
+        messages: Messages = list(agent_or_model.messages)
+        system_prompt = system_prompt or agent_or_model.system_prompt
+    else:
+        model = agent_or_model
+        messages = []
+    if prompt:
+        messages.append({"role": "user", "content": [{"text": prompt}]})
+    if not messages:
+        raise ValueError("No conversation history or prompt provided")
+
+    tool_spec = tool_spec or convert_pydantic_to_tool_spec(output_model)
+    partial_type = partial_model(output_model)
+    parser = PartialJSONParser(partial_strings=partial_strings)
+    in_tool_input = False
+    stop_reason = None
+    seen_version = 0
+
+    async for event in model.stream(
+        messages, [tool_spec], system_prompt, tool_choice=cast(ToolChoice, {"any": {}})
+    ):
+        if "contentBlockStart" in event:
+            tool_use = event["contentBlockStart"].get("start", {}).get("toolUse")
+            in_tool_input = tool_use is not None and tool_use["name"] == tool_spec["name"]
+        elif "contentBlockDelta" in event and in_tool_input:
+            chunk = event["contentBlockDelta"]["delta"].get("toolUse", {}).get("input", "")
+            if not chunk:
+                continue
+            parser.feed(chunk)
+            if parser.version != seen_version or partial_strings:
+                seen_version = parser.version
+                snapshot = parser.snapshot()
+                if isinstance(snapshot, dict):
+                    yield {"partial": partial_type.model_construct(**snapshot)}
+        elif "contentBlockStop" in event:
+            in_tool_input = False
+        elif "messageStop" in event:
+            stop_reason = event["messageStop"]["stopReason"]
+
+    if stop_reason != "tool_use":
+        raise ValueError(f'Model returned stop_reason: {stop_reason} instead of "tool_use".')
+    yield {"output": output_model(**json.loads(parser.text()))}
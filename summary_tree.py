@@ -0,0 +1,163 @@
+"""
+Hierarchical Summary Reuse
+
+- SummarizingConversationManager summarizes a slice that starts with the previous summary, so every reduction pays
+  again for everything summarized before, and the cost grows with the length of the session
+- HierarchicalSummarizingConversationManager only summarizes the messages evicted by this reduction (a leaf), and
+  merges summaries pairwise as a tree, like a binary counter: two summaries of the same level are merged into one of
+  the next level, so a session is covered by a few summaries (one per level) and each reduction makes one leaf call
+  plus, on average, about one merge of two short summaries
+- Every summary is cached by a content hash (of the messages for a leaf, of its two children for a merge), so the
+  same range is never summarized twice, e.g. after a failed turn is retried or when sessions share a history
+- The cache and the tree are part of the conversation manager state, so they persist through the session manager and
+  a restored session continues from them without re-summarizing
+- The summary message in the conversation is the current tree's summaries, oldest first
+
+Usage:
+    conversation_manager = HierarchicalSummarizingConversationManager(summary_ratio=0.4, preserve_recent_messages=8)
+    agent = Agent(conversation_manager=conversation_manager, session_manager=session_manager)
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+from strands.agent.conversation_manager import SummarizingConversationManager
+from strands.agent.conversation_manager.summarizing_conversation_manager import DEFAULT_SUMMARIZATION_PROMPT
+from strands.types.content import Message, Messages
+from strands.types.exceptions import ContextWindowOverflowException
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+MERGE_PROMPT = """Merge the following summaries of consecutive parts of one conversation into a single summary in the \
+same format. Keep every specific name, value, decision and tool result; drop only repetition."""
+
+
+def content_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class HierarchicalSummarizingConversationManager(SummarizingConversationManager):
+    """Summarizes only newly evicted messages and merges cached summaries as a tree."""
+
+    def __init__(
+        self,
+        summary_ratio: float = 0.3,
+        preserve_recent_messages: int = 10,
+        summarization_agent: Optional["Agent"] = None,
+        summarization_system_prompt: Optional[str] = None,
+        max_cached_summaries: int = 256,
+    ):
+        super().__init__(summary_ratio, preserve_recent_messages, summarization_agent, summarization_system_prompt)
+        self.max_cached_summaries = max_cached_summaries
+        # content hash -> summary text, least recently used first
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        # [level, hash] of the summaries covering the evicted history, oldest first; levels strictly decrease
+        self._roots: list[list[Any]] = []
+        self.summarized = 0
+        self.merged = 0
+        self.cache_hits = 0
+
+    def restore_from_session(self, state: dict[str, Any]) -> Optional[list[Message]]:
+        prepend = super().restore_from_session(state)
+        self._cache = OrderedDict(state.get("summary_cache", {}))
+        self._roots = [list(root) for root in state.get("summary_roots", [])]
+        return prepend
+
+    def get_state(self) -> dict[str, Any]:
+        return {**super().get_state(), "summary_cache": dict(self._cache), "summary_roots": self._roots}
+
+    def reduce_context(self, agent: "Agent", e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """Summarize the newly evicted messages and merge the summary into the tree."""
+        try:
+            messages = agent.messages
+            count = min(max(1, int(len(messages) * self.summary_ratio)), len(messages) - self.preserve_recent_messages)
+            if count <= 0:
+                raise ContextWindowOverflowException("Cannot summarize: insufficient messages for summarization")
+            count = self._adjust_split_point_for_tool_pairs(messages, count)
+
+            # The current summary message is already covered by the tree
+            start = 1 if self._summary_message is not None and messages[0] == self._summary_message else 0
+            evicted = messages[start:count]
+            if not evicted:
+                raise ContextWindowOverflowException("Cannot summarize: insufficient messages for summarization")
+
+            self._add_leaf(evicted, agent)
+            self.removed_message_count += len(evicted)
+            self._summary_message = {"role": "user", "content": [{"text": self._summary_text()}]}
+            messages[:] = [self._summary_message, *messages[count:]]
+            self._trim_cache()
+        except Exception as summarization_error:
+            logger.error("Summarization failed: %s", summarization_error)
+            raise summarization_error from e
+
+    def _add_leaf(self, evicted: Messages, agent: "Agent") -> None:
+        key = content_hash(evicted)
+        if not self._cached(key):
+            if evicted[0]["role"] != "user":
+                # The conversation has to start with a user message
+                opening = "(earlier conversation summarized separately)"
+                evicted = [{"role": "user", "content": [{"text": opening}]}, *evicted]
+            self._cache[key] = self._summarize(evicted, "Please summarize this conversation.", agent)
+            self.summarized += 1
+        self._roots.append([0, key])
+
+        while len(self._roots) >= 2 and self._roots[-1][0] == self._roots[-2][0]:
+            (level, left), (_, right) = self._roots[-2], self._roots[-1]
+            key = content_hash([left, right])
+            if not self._cached(key):
+                texts = "\n\n---\n\n".join([self._cache[left], self._cache[right]])
+                self._cache[key] = self._summarize([], f"{MERGE_PROMPT}\n\n{texts}", agent)
+                self.merged += 1
+            self._roots[-2:] = [[level + 1, key]]
+
+    def _cached(self, key: str) -> bool:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return True
+        return False
+
+    def _summary_text(self) -> str:
+        return "\n\n".join(self._cache[key] for _, key in self._roots)
+
+    def _trim_cache(self) -> None:
+        roots = {key for _, key in self._roots}
+        for key in list(self._cache):
+            if len(self._cache) <= self.max_cached_summaries:
+                break
+            if key not in roots:
+                del self._cache[key]
+
+    def _summarize(self, messages: Messages, prompt: str, agent: "Agent") -> str:
+        """Run one summarization call, like SummarizingConversationManager._generate_summary, returning the text."""
+        summarization_agent = self.summarization_agent if self.summarization_agent is not None else agent
+        original_system_prompt = summarization_agent.system_prompt
+        original_messages = summarization_agent.messages.copy()
+        try:
+            if self.summarization_agent is None:
+                summarization_agent.system_prompt = (
+                    self.summarization_system_prompt
+                    if self.summarization_system_prompt is not None
+                    else DEFAULT_SUMMARIZATION_PROMPT
+                )
+            summarization_agent.messages = list(messages)
+            result = summarization_agent(prompt)
+            return "".join(block.get("text", "") for block in cast(Message, result.message)["content"]).strip()
+        finally:
+            summarization_agent.system_prompt = original_system_prompt
+            summarization_agent.messages = original_messages
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "summarized": self.summarized,
+            "merged": self.merged,
+            "cache_hits": self.cache_hits,
+            "cached_summaries": len(self._cache),
+            "tree_levels": [level for level, _ in self._roots],
+        }
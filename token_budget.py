@@ -0,0 +1,172 @@
+"""
+Token-budget Conversation Manager
+
+- SlidingWindowConversationManager trims by message count, which says little about context size: one pasted
+  document can overflow the context while ten short turns waste most of it
+- TokenBudgetConversationManager trims the oldest messages until the conversation fits max_tokens (estimated)
+- Each message is estimated once, when it is first seen; the running total is updated as messages are appended or
+  trimmed, so a cycle only costs the new messages plus the removed ones (nothing is re-counted)
+- Like the sliding window, trimming never starts the conversation on a toolResult or on a toolUse without its
+  result, so tool-use / tool-result pairs stay intact
+- The most recent message is always kept; when it alone is over budget, or the model still overflows, large tool
+  results are truncated first (as the sliding window does), then the history is halved
+
+Usage:
+    conversation_manager = TokenBudgetConversationManager(max_tokens=50_000)
+    agent = Agent(conversation_manager=conversation_manager)
+    print(conversation_manager.total_tokens)
+"""
+
+import logging
+from collections import deque
+from typing import TYPE_CHECKING, Any, Optional
+
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.types.content import Message, Messages
+from strands.types.exceptions import ContextWindowOverflowException
+
+from model_utils import estimate_tokens
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+
+def _has(message: Message, key: str) -> bool:
+    return any(key in block for block in message["content"])
+
+
+class MessageTokenCounter:
+    """Estimated token count of a message list, updated incrementally.
+
+    Each message is estimated once, when first seen; messages appended since the last sync are added, and a replaced
+    history reuses the counts of the messages still in it.
+    """
+
+    def __init__(self) -> None:
+        # (message, estimated tokens), aligned with the messages as of the last sync; holding the message keeps the
+        # identity checks in sync valid
+        self._tracked: deque[tuple[Message, int]] = deque()
+        self.total = 0
+
+    def sync(self, messages: Messages) -> int:
+        """Bring the counts in line with messages, estimating only messages not seen before. Returns the total."""
+        tracked = self._tracked
+        if tracked and (
+            len(tracked) > len(messages)
+            or messages[0] is not tracked[0][0]
+            or messages[len(tracked) - 1] is not tracked[-1][0]
+        ):
+            # History was replaced (session restore, summarization, edits)
+            known = {id(message): tokens for message, tokens in tracked}
+            tracked.clear()
+            self.total = 0
+            for message in messages:
+                tokens = known.get(id(message))
+                if tokens is None:
+                    tokens = estimate_tokens(message["content"])
+                tracked.append((message, tokens))
+                self.total += tokens
+            return self.total
+
+        for message in messages[len(tracked) :]:
+            tokens = estimate_tokens(message["content"])
+            tracked.append((message, tokens))
+            self.total += tokens
+        return self.total
+
+    def __getitem__(self, index: int) -> int:
+        return self._tracked[index][1]
+
+    def remove_oldest(self, count: int) -> None:
+        """Account for the first count messages having been removed."""
+        for _ in range(count):
+            self.total -= self._tracked.popleft()[1]
+
+    def replace(self, old: Message, new: Message) -> None:
+        """Account for old having been replaced by new at the same position, if old is counted."""
+        for index in range(len(self._tracked) - 1, -1, -1):
+            if self._tracked[index][0] is old:
+                self.total -= self._tracked[index][1]
+                self._tracked[index] = (new, estimate_tokens(new["content"]))
+                self.total += self._tracked[index][1]
+                return
+
+    def refresh(self, index: int) -> None:
+        """Re-estimate a message that was changed in place."""
+        message, old = self._tracked[index]
+        new = estimate_tokens(message["content"])
+        self._tracked[index] = (message, new)
+        self.total += new - old
+
+
+class TokenBudgetConversationManager(SlidingWindowConversationManager):
+    """Keeps the conversation within a token budget instead of a message count."""
+
+    def __init__(self, max_tokens: int = 100_000, should_truncate_results: bool = True):
+        super().__init__(should_truncate_results=should_truncate_results)
+        self.max_tokens = max_tokens
+        self.counter = MessageTokenCounter()
+
+    @property
+    def total_tokens(self) -> int:
+        return self.counter.total
+
+    def apply_management(self, agent: "Agent", **kwargs: Any) -> None:
+        """Trim the oldest messages once the conversation is over max_tokens."""
+        self.counter.sync(agent.messages)
+        if self.total_tokens <= self.max_tokens:
+            logger.debug(
+                "total_tokens=<%s>, max_tokens=<%s> | skipping context reduction", self.total_tokens, self.max_tokens
+            )
+            return
+        if not self._trim(agent.messages, self.max_tokens):
+            self._truncate_latest_tool_results(agent.messages)
+
+    def reduce_context(self, agent: "Agent", e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """Called on a context window overflow: truncate tool results, else trim to half the current size."""
+        messages = agent.messages
+        self.counter.sync(messages)
+        if self._truncate_latest_tool_results(messages):
+            return
+        if not self._trim(messages, min(self.max_tokens, self.total_tokens // 2)):
+            raise ContextWindowOverflowException("Unable to trim conversation context!") from e
+
+    def _trim(self, messages: Messages, target: int) -> bool:
+        """Remove the oldest messages until the total is at most target (keeping the newest). False if none could."""
+        trim_index = 0
+        remaining = self.total_tokens
+        while trim_index < len(messages) - 1 and remaining > target:
+            remaining -= self.counter[trim_index]
+            trim_index += 1
+
+        # Move forward to a valid start: not a toolResult, and not a toolUse whose result was trimmed away
+        while trim_index < len(messages) and (
+            _has(messages[trim_index], "toolResult")
+            or (
+                _has(messages[trim_index], "toolUse")
+                and trim_index + 1 < len(messages)
+                and not _has(messages[trim_index + 1], "toolResult")
+            )
+        ):
+            trim_index += 1
+        if trim_index == 0 or trim_index >= len(messages):
+            return False
+
+        self._evict(messages[:trim_index])
+        self.counter.remove_oldest(trim_index)
+        self.removed_message_count += trim_index
+        messages[:] = messages[trim_index:]
+        logger.debug("removed=<%s>, total_tokens=<%s> | trimmed conversation", trim_index, self.total_tokens)
+        return True
+
+    def _evict(self, evicted: Messages) -> None:
+        """Called with the messages about to be trimmed; subclasses can keep them elsewhere."""
+
+    def _truncate_latest_tool_results(self, messages: Messages) -> bool:
+        index = self._find_last_message_with_tool_results(messages)
+        if index is None or not self.should_truncate_results or not self._truncate_tool_results(messages, index):
+            return False
+        self.counter.refresh(index)
+        return True
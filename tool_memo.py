@@ -0,0 +1,167 @@
+"""
+Tool Result Memoization
+
+- Opt-in cache for tools marked pure (same input -> same output, no side effects), e.g. calculator, letter_counter
+- Keyed on the tool name + canonicalized input (JSON with sorted keys), so {"a": 1, "b": 2} == {"b": 2, "a": 1}
+- Works for model-requested tool calls and direct calls (agent.tool.calculator(expression="123 * 456"))
+- LRU eviction bounded by entry count and total result size
+- A ToolResultCache can be private to one agent or shared by every agent in the process (shared_tool_cache)
+- Hit/miss counts are added to the agent's metrics: result.metrics.get_summary()["accumulated_metrics"]
+  ("toolCacheHits" / "toolCacheMisses"); cache-wide counts via cache.stats()
+- Tools that take the `agent` parameter or a tool context (and so can read or change agent state, like
+  track_user_action) are never cached, even if marked pure
+- Only successful results are cached
+
+Usage:
+    agent = Agent(tools=[calculator, letter_counter], hooks=[ToolMemoHook(pure_tools=[calculator, letter_counter])])
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from strands.experimental.hooks import AfterToolInvocationEvent, BeforeToolInvocationEvent
+from strands.hooks import HookProvider, HookRegistry
+from strands.tools.decorator import DecoratedFunctionTool
+from strands.tools.tools import PythonAgentTool
+from strands.types.tools import AgentTool
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultCache:
+    """Thread-safe LRU cache of tool results, bounded by entries and total size in bytes."""
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[int, dict[str, Any]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, result: dict[str, Any]) -> None:
+        size = len(key) + len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[0]
+            self._entries[key] = (size, result)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# One cache for all agents in the process that opt into sharing
+shared_tool_cache = ToolResultCache()
+
+
+def tool_name(tool: Any) -> str:
+    """Name of a tool given as a name, an AgentTool / @tool function or a tool module."""
+    if isinstance(tool, str):
+        return tool
+    if isinstance(tool, AgentTool):
+        return tool.tool_name
+    if hasattr(tool, "TOOL_SPEC"):
+        return tool.TOOL_SPEC["name"]
+    # Tool modules like strands_tools.calculator that wrap a @tool function of the same name
+    module_tool = getattr(tool, getattr(tool, "__name__", "").rsplit(".", 1)[-1], None)
+    if isinstance(module_tool, AgentTool):
+        return module_tool.tool_name
+    raise ValueError(f"Can't determine the name of tool {tool!r}")
+
+
+def touches_agent(tool: Optional[AgentTool]) -> bool:
+    """True if the tool asks for the agent or a tool context, so it may read or change agent state."""
+    if not isinstance(tool, DecoratedFunctionTool):
+        return False
+    metadata = tool._metadata
+    parameters = metadata.signature.parameters
+    return "agent" in parameters or (metadata._context_param is not None and metadata._context_param in parameters)
+
+
+class ToolMemoHook(HookProvider):
+    """Serves repeated calls to pure tools from a ToolResultCache."""
+
+    def __init__(self, pure_tools: Iterable[Any], cache: Optional[ToolResultCache] = None):
+        self.pure_tools = {tool_name(tool) for tool in pure_tools}
+        self.cache = cache if cache is not None else ToolResultCache()
+        self._excluded: set[str] = set()
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeToolInvocationEvent, self._before_tool)
+        registry.add_callback(AfterToolInvocationEvent, self._after_tool)
+
+    def _cacheable(self, name: str, tool: Optional[AgentTool]) -> bool:
+        if name not in self.pure_tools or name in self._excluded or tool is None:
+            return False
+        if touches_agent(tool):
+            logger.warning("tool_name=<%s> | tool uses agent state, not caching its results", name)
+            self._excluded.add(name)
+            return False
+        return True
+
+    @staticmethod
+    def _key(tool_use: dict[str, Any]) -> str:
+        return tool_use["name"] + ":" + json.dumps(tool_use.get("input", {}), sort_keys=True, separators=(",", ":"))
+
+    def _before_tool(self, event: BeforeToolInvocationEvent) -> None:
+        name = event.tool_use["name"]
+        if not self._cacheable(name, event.selected_tool):
+            return
+
+        cached = self.cache.get(self._key(event.tool_use))
+        _count(event.agent, "toolCacheHits" if cached is not None else "toolCacheMisses")
+        if cached is not None:
+            event.selected_tool = _cached_tool(event.selected_tool, cached)
+
+    def _after_tool(self, event: AfterToolInvocationEvent) -> None:
+        name = event.tool_use["name"]
+        if event.result.get("status") != "success" or getattr(event.selected_tool, "_memo_hit", False):
+            return
+        if not self._cacheable(name, event.selected_tool):
+            return
+        self.cache.set(self._key(event.tool_use), {"status": "success", "content": event.result["content"]})
+
+
+def _count(agent: Any, counter: str) -> None:
+    metrics = agent.event_loop_metrics.accumulated_metrics
+    metrics[counter] = metrics.get(counter, 0) + 1
+
+
+def _cached_tool(tool: AgentTool, cached: dict[str, Any]) -> PythonAgentTool:
+    """Stand-in for the real tool that answers from the cache."""
+
+    def cached_result(tool_use: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        return {"toolUseId": tool_use["toolUseId"], **cached}
+
+    stand_in = PythonAgentTool(tool.tool_name, tool.tool_spec, cached_result)
+    stand_in._memo_hit = True
+    return stand_in